@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from app.services.metrics import get_counters
+
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("")
+def list_metrics(prefix: str | None = None) -> dict:
+    return {"counters": get_counters(prefix=prefix)}
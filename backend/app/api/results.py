@@ -31,6 +31,12 @@ def get_web_search_snapshot(run_id: str, db: Session = Depends(get_db)) -> dict:
     snap = db.query(WebSearchSnapshot).filter(WebSearchSnapshot.run_id == run_id).one_or_none()
     if not snap:
         raise HTTPException(status_code=404, detail="Snapshot not found")
-    return {"run_id": run_id, "query": snap.query, "results": snap.results}
+    return {
+        "run_id": run_id,
+        "query": snap.query,
+        "results": snap.results,
+        "fetched_at": snap.fetched_at,
+        "from_cache": snap.from_cache,
+    }
 
 
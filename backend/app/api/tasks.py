@@ -1,28 +1,46 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import desc, select
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.config import get_settings
 from app.models import Run, Task
-from app.schemas import RunOut, TaskCreate, TaskOut, TaskUpdate
-from app.utils.cron import compute_next_run_at, ensure_min_cron_interval_minutes
+from app.schemas import RunOut, TaskCreate, TaskOut, TaskScheduleOut, TaskUpdate
+from app.services.enqueue import effective_jitter_seconds, task_next_run_at
+from app.utils.cron import MIN_CRON_INTERVAL_MINUTES, ensure_min_cron_interval_minutes, next_run_times, zone
 
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
 
+_UPDATABLE_FIELDS = [
+    "name",
+    "prompt",
+    "cron_expression",
+    "timezone",
+    "web_search_enabled",
+    "status",
+    "execution_mode",
+    "llm_cache_ttl_seconds",
+    "web_search_cache_ttl_seconds",
+    "llm_hedge_after_seconds",
+    "max_output_tokens",
+    "jitter_seconds",
+]
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
 def _validate_timezone(tz: str) -> None:
     try:
-        ZoneInfo(tz)
+        zone(tz)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid timezone: {tz}") from e
 
@@ -41,25 +59,36 @@ def create_task(payload: TaskCreate, db: Session = Depends(get_db)) -> Task:
             cron_expression=payload.cron_expression,
             timezone=payload.timezone,
             base_time_utc=now,
-            min_minutes=15,
+            min_minutes=MIN_CRON_INTERVAL_MINUTES,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
     task = Task(
+        # Assigned up front: the task id seeds its jitter offset.
+        id=str(uuid.uuid4()),
         name=payload.name,
         prompt=payload.prompt,
         cron_expression=payload.cron_expression,
         timezone=payload.timezone,
         web_search_enabled=payload.web_search_enabled,
         status=payload.status,
+        execution_mode=payload.execution_mode,
+        llm_cache_ttl_seconds=payload.llm_cache_ttl_seconds,
+        web_search_cache_ttl_seconds=payload.web_search_cache_ttl_seconds,
+        llm_hedge_after_seconds=payload.llm_hedge_after_seconds,
+        max_output_tokens=payload.max_output_tokens,
+        jitter_seconds=payload.jitter_seconds,
     )
 
     if payload.status == "enabled":
-        task.next_run_at = compute_next_run_at(
+        task.next_run_at = task_next_run_at(
+            task_id=task.id,
             cron_expression=payload.cron_expression,
-            timezone=payload.timezone,
-            base_time_utc=now,
+            tz=payload.timezone,
+            jitter_seconds=payload.jitter_seconds,
+            now=now,
+            settings=get_settings(),
         )
 
     db.add(task)
@@ -76,6 +105,34 @@ def get_task(task_id: str, db: Session = Depends(get_db)) -> Task:
     return task
 
 
+@router.get("/{task_id}/schedule", response_model=TaskScheduleOut)
+def get_task_schedule(
+    task_id: str, count: int = Query(default=5, ge=1, le=100), db: Session = Depends(get_db)
+) -> TaskScheduleOut:
+    task = db.get(Task, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    settings = get_settings()
+    fire_times: list[datetime] = []
+    if task.status == "enabled":
+        try:
+            fire_times = next_run_times(
+                cron_expression=task.cron_expression,
+                timezone=task.timezone,
+                base_time_utc=_utcnow(),
+                count=count,
+                task_id=task.id,
+                jitter_seconds=effective_jitter_seconds(task.jitter_seconds, settings=settings),
+                jitter_mode=settings.scheduler_jitter_mode,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid schedule: {e}") from e
+    return TaskScheduleOut(
+        task_id=task.id, cron_expression=task.cron_expression, timezone=task.timezone, fire_times=fire_times
+    )
+
+
 @router.patch("/{task_id}", response_model=TaskOut)
 def update_task(task_id: str, payload: TaskUpdate, db: Session = Depends(get_db)) -> Task:
     task = db.get(Task, task_id)
@@ -88,7 +145,7 @@ def update_task(task_id: str, payload: TaskUpdate, db: Session = Depends(get_db)
         _validate_timezone(payload.timezone)
 
     # Apply updates
-    for field in ["name", "prompt", "cron_expression", "timezone", "web_search_enabled", "status"]:
+    for field in _UPDATABLE_FIELDS:
         val = getattr(payload, field)
         if val is not None:
             setattr(task, field, val)
@@ -99,16 +156,19 @@ def update_task(task_id: str, payload: TaskUpdate, db: Session = Depends(get_db)
             cron_expression=task.cron_expression,
             timezone=task.timezone,
             base_time_utc=now,
-            min_minutes=15,
+            min_minutes=MIN_CRON_INTERVAL_MINUTES,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
 
     if task.status == "enabled":
-        task.next_run_at = compute_next_run_at(
+        task.next_run_at = task_next_run_at(
+            task_id=task.id,
             cron_expression=task.cron_expression,
-            timezone=task.timezone,
-            base_time_utc=now,
+            tz=task.timezone,
+            jitter_seconds=task.jitter_seconds,
+            now=now,
+            settings=get_settings(),
         )
     else:
         task.next_run_at = None
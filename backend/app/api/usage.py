@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import desc, func, select
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.models import Run, Task
+from app.schemas.usage import UsageAggregate
+
+
+router = APIRouter(prefix="/api/usage", tags=["usage"])
+
+
+def _usage_columns() -> list:
+    def tokens(field: str):
+        return func.coalesce(func.sum(func.json_extract(Run.token_usage, f"$.{field}")), 0)
+
+    return [
+        func.count(Run.id).label("runs"),
+        tokens("prompt_tokens").label("prompt_tokens"),
+        tokens("completion_tokens").label("completion_tokens"),
+        tokens("total_tokens").label("total_tokens"),
+        tokens("cached_prompt_tokens").label("cached_prompt_tokens"),
+        func.coalesce(func.sum(Run.cost_estimate), 0.0).label("cost_estimate"),
+    ]
+
+
+def _aggregate(db: Session, *, key, label=None, order_by=None, since: datetime | None, limit: int) -> list[UsageAggregate]:  # type: ignore[no-untyped-def]
+    cols = [key.label("key"), (label if label is not None else key).label("label"), *_usage_columns()]
+    # token_usage may hold JSON null, so filter on an extracted field rather than the column.
+    q = select(*cols).where(func.json_extract(Run.token_usage, "$.total_tokens").is_not(None))
+    if label is not None:
+        q = q.join(Task, Task.id == Run.task_id)
+    if since is not None:
+        q = q.where(Run.scheduled_for >= since)
+    q = q.group_by(key).order_by(order_by if order_by is not None else desc("total_tokens")).limit(limit)
+    return [UsageAggregate(**row._asdict()) for row in db.execute(q).all()]
+
+
+@router.get("/tasks", response_model=list[UsageAggregate])
+def usage_by_task(since: datetime | None = None, limit: int = 100, db: Session = Depends(get_db)) -> list[UsageAggregate]:
+    return _aggregate(db, key=Run.task_id, label=Task.name, since=since, limit=limit)
+
+
+@router.get("/daily", response_model=list[UsageAggregate])
+def usage_by_day(since: datetime | None = None, limit: int = 90, db: Session = Depends(get_db)) -> list[UsageAggregate]:
+    day = func.date(Run.scheduled_for)
+    return _aggregate(db, key=day, order_by=desc(day), since=since, limit=limit)
+
+
+@router.get("/models", response_model=list[UsageAggregate])
+def usage_by_model(since: datetime | None = None, limit: int = 100, db: Session = Depends(get_db)) -> list[UsageAggregate]:
+    return _aggregate(db, key=Run.llm_model, since=since, limit=limit)
@@ -6,7 +6,7 @@ import sys
 import uvicorn
 
 from app.database import ENGINE
-from app.models import Base
+from app.schema_upgrade import upgrade_schema
 from app.services.scheduler import run_scheduler_loop
 from app.services.worker import run_worker_loop
 
@@ -20,12 +20,13 @@ def main(argv: list[str] | None = None) -> int:
     api_p.add_argument("--port", type=int, default=8000)
 
     sub.add_parser("scheduler")
-    sub.add_parser("worker")
+    worker_p = sub.add_parser("worker")
+    worker_p.add_argument("--concurrency", type=int, default=None, help="Max runs executed in parallel")
 
     args = parser.parse_args(argv)
 
-    # Ensure tables exist for any process (api/scheduler/worker).
-    Base.metadata.create_all(bind=ENGINE)
+    # Ensure tables exist and are up to date for any process (api/scheduler/worker).
+    upgrade_schema(ENGINE)
 
     if args.cmd == "api":
         uvicorn.run("app.main:app", host=args.host, port=args.port, reload=False)
@@ -36,7 +37,7 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     if args.cmd == "worker":
-        run_worker_loop()
+        run_worker_loop(concurrency=args.concurrency)
         return 0
 
     raise RuntimeError(f"Unknown command: {args.cmd}")
@@ -16,13 +16,82 @@ class Settings(BaseSettings):
     deepseek_api_key: str | None = None
     deepseek_base_url: str = "https://api.deepseek.com"
     default_llm_model: str = "gpt-4o-mini"
+    # Ordered fallback/hedge chain, e.g. "openai:gpt-4o-mini,deepseek:deepseek-chat,gemini:gemini-2.5-flash".
+    # Empty -> LLM_PROVIDER + DEFAULT_LLM_MODEL only.
+    llm_provider_chain: str = ""
+    llm_hedge_after_seconds: float = 0.0  # send to the next provider if the primary is slower (0 = off)
+    llm_hedge_use_p95: bool = False  # without a fixed deadline, hedge after the primary's observed p95
+    # USD per 1M tokens, used for Run.cost_estimate. Override with
+    # LLM_PRICES='{"model": {"input": .., "cached_input": .., "output": ..}}' (cached_input defaults to input).
+    llm_prices: dict[str, dict[str, float]] = {
+        "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+        "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+        "deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10},
+        "gemini-2.5-flash": {"input": 0.30, "cached_input": 0.075, "output": 2.50},
+    }
+    llm_streaming: bool = False  # stream completions and abort early on clearly malformed output
+    llm_cache_ttl_seconds: int = 0  # default response-cache TTL for tasks without their own (0 = off)
+    llm_cache_max_entries: int = 1000  # LRU bound of the SQLite response cache
+    llm_max_output_tokens: int = 2000  # output budget for tasks without enough successful runs to learn from
+    llm_output_budget_headroom: float = 1.5  # learned budget = p99 of past completion tokens x headroom
+    llm_output_budget_min: int = 256
+    llm_output_budget_max: int = 8192  # also caps the doubled budget after a truncated answer
+    llm_output_budget_window: int = 50  # recent successful runs considered
+    llm_output_budget_min_samples: int = 5
+    # Deferred tasks go through an OpenAI-compatible Batch API (/files + /batches). Without a base URL,
+    # OpenAI is used when OPENAI_API_KEY is set; otherwise deferred tasks run immediately.
+    llm_batch_base_url: str | None = None
+    llm_batch_api_key: str | None = None  # defaults to OPENAI_API_KEY
+    llm_batch_model: str | None = None  # defaults to the primary model when it is an OpenAI one; required otherwise
+    llm_batch_min_size: int = 20  # submit once this many deferred runs are queued...
+    llm_batch_max_wait_seconds: int = 600  # ...or the oldest one has waited this long
+    llm_batch_max_size: int = 1000
+    llm_batch_poll_interval: int = 60
+    llm_batch_completion_window: str = "24h"
+    llm_batch_price_factor: float = 0.5  # batch discount applied to Run.cost_estimate
+    # Request/token budgets per "provider:model" (or "provider"), shared by all workers through SQLite, e.g.
+    # LLM_RATE_LIMITS='{"openai:gpt-4o-mini": {"rpm": 500, "tpm": 200000}}'. Unlisted targets are unlimited.
+    llm_rate_limits: dict[str, dict[str, int]] = {}
+    llm_rate_limit_max_wait_seconds: float = 300.0  # fail the attempt if the budget frees up later than this
+    llm_max_concurrency: int = 16  # upper bound of the adaptive in-flight limit per provider:model and process
+    llm_min_concurrency: int = 1
+    llm_max_attempts: int = 5  # attempts on 429/timeout/5xx (invalid output is retried once)
+    llm_retry_max_wait_seconds: float = 60.0  # cap for backoff and Retry-After delays
 
     # Web search
     tavily_api_key: str | None = None
+    web_search_cache_ttl_seconds: int = 0  # default freshness window for reusing results (0 = off)
+    web_search_prefetch_lead_seconds: int = 0  # scheduler fetches results this long before a run fires (0 = off)
+    web_results_token_budget: int = 1200  # max (estimated) prompt tokens for the <WEB_RESULTS> block (0 = unlimited)
+    web_results_max_snippet_tokens: int = 300  # per-result snippet cap, so one long page cannot crowd out the rest
+    web_search_timeout: float = 20.0
+    web_search_connect_timeout: float = 5.0
+    web_search_http2: bool = True
+    web_search_max_connections: int = 20
+    web_search_max_keepalive_connections: int = 10
+    web_search_keepalive_expiry: float = 60.0
 
     # Loops
+    scheduler_engine: str = "apscheduler"  # apscheduler | heap (DB-driven, for very large task counts)
     scheduler_interval: int = 10
+    scheduler_full_resync_seconds: int = 3600  # safety-net full task scan; ticks in between only apply logged changes
+    scheduler_heap_horizon_seconds: int = 3600  # heap engine: only tasks due within this window are kept in memory
+    scheduler_misfire_grace_seconds: int = 60  # heap engine: fire times missed by more than this are skipped
+    scheduler_enqueue_window_ms: int = 200  # apscheduler engine: firings this close together share one enqueue transaction (0 = off)
+    scheduler_jitter_seconds: int = 0  # default per-task fire-time spread (tasks can override); capped so runs stay >= 15 min apart
+    scheduler_jitter_mode: str = "hash"  # hash: fixed offset per task | random: new offset per firing (reproducible)
     worker_poll_interval: int = 2
+    worker_idle_backoff_min: float = 0.25  # first re-check delay when the queue is empty (doubles up to poll interval)
+    worker_wakeup_check_interval: float = 0.1  # how often an idle worker checks SQLite for new commits
+    worker_concurrency: int = 1  # max runs executed in parallel by one worker process
+    worker_claim_batch: int = 16  # max queued runs claimed per DB round-trip
+    worker_lease_seconds: int = 120  # claimed runs are re-queued if not heartbeated within this window
+    worker_id: str | None = None  # defaults to "<hostname>-<pid>-<random>"
+    # Answer claimed runs of tasks sharing a cron schedule with one LLM call (short prompts without
+    # web search or response cache only); invalid sub-results fall back to individual calls.
+    worker_packing_enabled: bool = False
+    worker_packing_max_runs: int = 8
+    worker_packing_max_prompt_chars: int = 500
 
 
 def get_settings() -> Settings:
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import json
 import sqlite3
 from contextlib import contextmanager
 
+import orjson
+
 from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
@@ -19,11 +22,22 @@ def _configure_sqlite(dbapi_connection: sqlite3.Connection) -> None:
     cursor.close()
 
 
+def _json_dumps(obj: object) -> str:
+    # orjson is several times faster than stdlib json for large result tables (JSON columns).
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except TypeError:
+        # e.g. integers beyond 64 bits, which stdlib json still handles.
+        return json.dumps(obj, ensure_ascii=False)
+
+
 def create_db_engine() -> Engine:
     settings = get_settings()
     engine = create_engine(
         settings.database_url,
         connect_args={"check_same_thread": False},
+        json_serializer=_json_dumps,
+        json_deserializer=orjson.loads,
         future=True,
     )
 
@@ -3,11 +3,13 @@ from __future__ import annotations
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.metrics import router as metrics_router
 from app.api.results import router as results_router
 from app.api.runs import router as runs_router
 from app.api.tasks import router as tasks_router
-from app.models import Base  # noqa: F401 (import side effects for metadata)
+from app.api.usage import router as usage_router
 from app.database import ENGINE
+from app.schema_upgrade import upgrade_schema
 
 
 def create_app() -> FastAPI:
@@ -28,6 +30,8 @@ def create_app() -> FastAPI:
     app.include_router(tasks_router)
     app.include_router(runs_router)
     app.include_router(results_router)
+    app.include_router(metrics_router)
+    app.include_router(usage_router)
     return app
 
 
@@ -36,7 +40,7 @@ app = create_app()
 
 @app.on_event("startup")
 def _startup() -> None:
-    # MVP convenience: auto-create tables.
-    Base.metadata.create_all(bind=ENGINE)
+    # Create tables and upgrade databases created by older versions.
+    upgrade_schema(ENGINE)
 
 
@@ -1,7 +1,12 @@
 from app.models.base import Base
+from app.models.llm_batch import LLMBatch
+from app.models.llm_cache_entry import LLMCacheEntry
+from app.models.metric_counter import MetricCounter
+from app.models.rate_limit_bucket import RateLimitBucket
 from app.models.result import Result
 from app.models.run import Run
 from app.models.task import Task
+from app.models.task_change import TaskChange
 from app.models.web_search_snapshot import WebSearchSnapshot
 
 __all__ = [
@@ -10,6 +15,11 @@ __all__ = [
     "Run",
     "Result",
     "WebSearchSnapshot",
+    "LLMCacheEntry",
+    "MetricCounter",
+    "RateLimitBucket",
+    "LLMBatch",
+    "TaskChange",
 ]
 
 
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base, TimestampMixin
+
+
+class LLMBatch(Base, TimestampMixin):
+    __tablename__ = "llm_batches"
+    __table_args__ = (Index("ix_llm_batches_status_next_poll_at", "status", "next_poll_at"),)
+
+    # Batch id assigned by the provider.
+    id: Mapped[str] = mapped_column(String(120), primary_key=True)
+    # Provider status: validating|in_progress|finalizing|completed|failed|expired|cancelling|cancelled
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    model: Mapped[str] = mapped_column(String(120), nullable=False)
+    input_file_id: Mapped[str] = mapped_column(String(120), nullable=False)
+    output_file_id: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    error_file_id: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    request_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    next_poll_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    runs: Mapped[list["Run"]] = relationship(back_populates="batch")  # type: ignore[name-defined]
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, TimestampMixin
+
+
+class LLMCacheEntry(Base, TimestampMixin):
+    __tablename__ = "llm_cache"
+
+    # sha256 over provider/model/prompts/format instructions (see app.services.llm_cache).
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    provider: Mapped[str] = mapped_column(String(32), nullable=False)
+    model: Mapped[str] = mapped_column(String(120), nullable=False)
+
+    table: Mapped[dict] = mapped_column(SQLiteJSON, nullable=False)
+    llm_model: Mapped[str | None] = mapped_column(String(120), nullable=True)
+
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
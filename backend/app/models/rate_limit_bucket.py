@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # "<provider>:<model>:rpm" / "<provider>:<model>:tpm"
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Epoch seconds of the last refill, so the refill can be computed in SQL.
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, String, Text
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,7 @@ from app.models.base import Base, TimestampMixin
 
 class Run(Base, TimestampMixin):
     __tablename__ = "runs"
+    __table_args__ = (Index("ix_runs_status_scheduled_for", "status", "scheduled_for"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     task_id: Mapped[str] = mapped_column(String(36), ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
@@ -23,11 +24,21 @@ class Run(Base, TimestampMixin):
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")  # queued|running|success|failed
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    # Claim/lease bookkeeping for multiple worker processes.
+    worker_id: Mapped[str | None] = mapped_column(String(120), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Deferred runs waiting on a provider batch job (no lease while they wait).
+    batch_id: Mapped[str | None] = mapped_column(String(120), ForeignKey("llm_batches.id"), nullable=True, index=True)
+
     llm_model: Mapped[str | None] = mapped_column(String(120), nullable=True)
     token_usage: Mapped[dict | None] = mapped_column(SQLiteJSON, nullable=True)
     cost_estimate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    llm_cache_hit: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Execution details of the run (LLM timings in ms, streaming, attempts, ...).
+    stats: Mapped[dict | None] = mapped_column(SQLiteJSON, nullable=True)
 
     task: Mapped["Task"] = relationship(back_populates="runs")  # type: ignore[name-defined]
+    batch: Mapped["LLMBatch | None"] = relationship(back_populates="runs")  # type: ignore[name-defined]
     result: Mapped["Result | None"] = relationship(back_populates="run", cascade="all,delete", uselist=False)  # type: ignore[name-defined]
     web_search_snapshot: Mapped["WebSearchSnapshot | None"] = relationship(  # type: ignore[name-defined]
         back_populates="run",
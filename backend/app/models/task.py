@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, String, Text
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -19,8 +19,23 @@ class Task(Base, TimestampMixin):
     timezone: Mapped[str] = mapped_column(String(64), nullable=False, default="UTC")
     web_search_enabled: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     status: Mapped[str] = mapped_column(String(16), nullable=False, default="enabled")  # enabled|disabled
-
-    next_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # deferred: runs are collected into provider batch jobs (cheaper, results within the batch window).
+    execution_mode: Mapped[str] = mapped_column(String(16), nullable=False, default="immediate")  # immediate|deferred
+
+    # Reuse identical LLM responses for this long (None -> LLM_CACHE_TTL_SECONDS, 0 -> never cache).
+    llm_cache_ttl_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Reuse web search results for the same query this fresh (None -> WEB_SEARCH_CACHE_TTL_SECONDS).
+    web_search_cache_ttl_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Hedge to the next provider in LLM_PROVIDER_CHAIN after this many seconds (None -> global setting).
+    llm_hedge_after_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # max_tokens for the LLM answer (None -> learned from past runs, see output_budget).
+    max_output_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Shift each firing by up to this many seconds (None -> SCHEDULER_JITTER_SECONDS, 0 -> exact).
+    jitter_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # UTC, jitter included; indexed for the heap scheduler engine's due-task scans.
+    next_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
 
     runs: Mapped[list["Run"]] = relationship(back_populates="task", cascade="all,delete")  # type: ignore[name-defined]
 
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, Integer, String, delete, event, insert, inspect
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.models.base import Base, utcnow
+from app.models.task import Task
+
+
+class TaskChange(Base):
+    """
+    Append-only log of schedule-relevant task changes; the scheduler reconciles from its last
+    seen `seq` instead of rescanning every task.
+    """
+
+    __tablename__ = "task_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # No FK: deletions are logged too.
+    task_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow, index=True)
+
+
+# The log only needs to cover the gap between two full resyncs of either scheduler engine.
+TASK_CHANGE_RETENTION = timedelta(days=1)
+
+
+def prune_task_changes(s: Session, *, now: datetime) -> None:
+    s.execute(delete(TaskChange).where(TaskChange.created_at < now - TASK_CHANGE_RETENTION))
+
+
+# Fields that affect the task's scheduler job (next_run_at updates by the scheduler itself don't).
+SCHEDULE_FIELDS = ("cron_expression", "timezone", "status", "jitter_seconds")
+
+
+def _log_change(connection, task_id: str) -> None:  # type: ignore[no-untyped-def]
+    connection.execute(insert(TaskChange).values(task_id=task_id, created_at=utcnow()))
+
+
+@event.listens_for(Task, "after_insert")
+def _task_inserted(_mapper, connection, target: Task) -> None:  # type: ignore[no-untyped-def]
+    _log_change(connection, target.id)
+
+
+@event.listens_for(Task, "after_update")
+def _task_updated(_mapper, connection, target: Task) -> None:  # type: ignore[no-untyped-def]
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SCHEDULE_FIELDS):
+        _log_change(connection, target.id)
+
+
+@event.listens_for(Task, "after_delete")
+def _task_deleted(_mapper, connection, target: Task) -> None:  # type: ignore[no-untyped-def]
+    _log_change(connection, target.id)
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -11,13 +12,25 @@ from app.models.base import Base, TimestampMixin
 
 class WebSearchSnapshot(Base, TimestampMixin):
     __tablename__ = "web_search_snapshots"
+    __table_args__ = (Index("ix_web_search_snapshots_cache_key_fetched_at", "cache_key", "fetched_at"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    run_id: Mapped[str] = mapped_column(String(36), ForeignKey("runs.id", ondelete="CASCADE"), unique=True, index=True)
+    # NULL while the snapshot is a pending prefetch that no run has picked up yet.
+    run_id: Mapped[str | None] = mapped_column(
+        String(36), ForeignKey("runs.id", ondelete="CASCADE"), unique=True, index=True, nullable=True
+    )
+    task_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("tasks.id", ondelete="CASCADE"), index=True, nullable=True)
+    # Fire time (UTC) a pending prefetch was made for.
+    prefetched_for: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     query: Mapped[str] = mapped_column(String(500), nullable=False)
     results: Mapped[list[dict]] = mapped_column(SQLiteJSON, nullable=False)
 
-    run: Mapped["Run"] = relationship(back_populates="web_search_snapshot")  # type: ignore[name-defined]
+    # Search-result cache: normalized query hash, original fetch time, and whether this copy was reused.
+    cache_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    fetched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    from_cache: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    run: Mapped["Run | None"] = relationship(back_populates="web_search_snapshot")  # type: ignore[name-defined]
 
 
@@ -49,3 +49,11 @@ def wrap_web_results(results_json: str) -> str:
     return f"<WEB_RESULTS>\n{results_json}\n</WEB_RESULTS>"
 
 
+PACKED_INSTRUCTIONS = """You will receive several independent requests, each introduced by a line "### Request <id>".
+Answer every request on its own. Return ONLY a JSON object of the form {"results": {"<id>": <table>, ...}} with exactly one entry per request id, where each <table> follows the schema above."""
+
+
+def build_packed_user_prompt(prompts: dict[str, str]) -> str:
+    # The instructions live here rather than in the system message, which stays identical for every call.
+    requests = "\n\n".join(f"### Request {request_id}\n{prompt}" for request_id, prompt in prompts.items())
+    return f"{PACKED_INSTRUCTIONS}\n\n{requests}"
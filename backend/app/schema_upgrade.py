@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Table, inspect, literal
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from app.models import Base
+
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def _column_ddl(conn: Connection, column: Column) -> str:
+    ddl = f"{_quote(conn, column.name)} {column.type.compile(dialect=conn.dialect)}"
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        value = literal(default, type_=column.type).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        ddl += f" DEFAULT {value}"
+        # NOT NULL needs a default for the existing rows; without one the column is added nullable.
+        if not column.nullable:
+            ddl += " NOT NULL"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {_quote(conn, fk.column.table.name)} ({_quote(conn, fk.column.name)})"
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+    return ddl
+
+
+def _rebuild_sqlite_table(conn: Connection, table: Table) -> None:
+    # SQLite cannot drop NOT NULL in place: create the current definition under a temporary name,
+    # copy the rows, swap. Missing columns were added beforehand; indexes are recreated by the caller.
+    tmp = f"{table.name}__upgrade"
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    conn.exec_driver_sql(ddl.replace(f"CREATE TABLE {_quote(conn, table.name)} ", f"CREATE TABLE {_quote(conn, tmp)} ", 1))
+    columns = ", ".join(_quote(conn, column.name) for column in table.columns)
+    conn.exec_driver_sql(f"INSERT INTO {_quote(conn, tmp)} ({columns}) SELECT {columns} FROM {_quote(conn, table.name)}")
+    conn.exec_driver_sql(f"DROP TABLE {_quote(conn, table.name)}")
+    conn.exec_driver_sql(f"ALTER TABLE {_quote(conn, tmp)} RENAME TO {_quote(conn, table.name)}")
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Create missing tables, then bring tables created by older versions in line with the models:
+    add missing columns and indexes, and relax columns that became nullable. Idempotent; run by
+    every process at start-up (`create_all` alone never alters an existing table).
+    """
+    with engine.connect() as conn:
+        sqlite = conn.dialect.name == "sqlite"
+        if sqlite:
+            # A table rebuild drops the old table; with foreign keys on, that would cascade to
+            # referencing rows. The pragma is ignored inside a transaction, so set it first.
+            conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            conn.commit()
+            # api/scheduler/worker start together: take the write lock so they upgrade one at a time.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            Base.metadata.create_all(bind=conn)
+            inspector = inspect(conn)
+            for table in Base.metadata.sorted_tables:
+                existing = {col["name"]: col for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        conn.exec_driver_sql(f"ALTER TABLE {_quote(conn, table.name)} ADD COLUMN {_column_ddl(conn, column)}")
+
+                relaxed = [
+                    column.name
+                    for column in table.columns
+                    if column.nullable and not column.primary_key and column.name in existing
+                    and not existing[column.name]["nullable"]
+                ]
+                if relaxed and sqlite:
+                    _rebuild_sqlite_table(conn, table)
+                else:
+                    for name in relaxed:
+                        conn.exec_driver_sql(
+                            f"ALTER TABLE {_quote(conn, table.name)} ALTER COLUMN {_quote(conn, name)} DROP NOT NULL"
+                        )
+
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+            conn.commit()
+        finally:
+            if sqlite:
+                conn.exec_driver_sql("PRAGMA foreign_keys=ON")
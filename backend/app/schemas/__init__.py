@@ -1,11 +1,12 @@
 from app.schemas.result import ResultOut, TableColumn
 from app.schemas.run import RunOut
-from app.schemas.task import TaskCreate, TaskOut, TaskUpdate
+from app.schemas.task import TaskCreate, TaskOut, TaskScheduleOut, TaskUpdate
 
 __all__ = [
     "TaskCreate",
     "TaskUpdate",
     "TaskOut",
+    "TaskScheduleOut",
     "RunOut",
     "TableColumn",
     "ResultOut",
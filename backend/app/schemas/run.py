@@ -17,9 +17,14 @@ class RunOut(BaseModel):
     finished_at: datetime | None
     status: RunStatus
     error_message: str | None
+    worker_id: str | None = None
+    lease_expires_at: datetime | None = None
+    batch_id: str | None = None
     llm_model: str | None
     token_usage: dict | None
     cost_estimate: float | None
+    llm_cache_hit: bool = False
+    stats: dict | None = None
     created_at: datetime
     updated_at: datetime
 
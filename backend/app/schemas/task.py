@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 
 
 TaskStatus = Literal["enabled", "disabled"]
+ExecutionMode = Literal["immediate", "deferred"]
 
 
 class TaskCreate(BaseModel):
@@ -16,6 +17,12 @@ class TaskCreate(BaseModel):
     timezone: str = Field(default="UTC", min_length=1, max_length=64)
     web_search_enabled: bool = False
     status: TaskStatus = "enabled"
+    execution_mode: ExecutionMode = "immediate"
+    llm_cache_ttl_seconds: int | None = Field(default=None, ge=0)
+    web_search_cache_ttl_seconds: int | None = Field(default=None, ge=0)
+    llm_hedge_after_seconds: float | None = Field(default=None, ge=0)
+    max_output_tokens: int | None = Field(default=None, ge=1)
+    jitter_seconds: int | None = Field(default=None, ge=0, le=86400)
 
 
 class TaskUpdate(BaseModel):
@@ -25,6 +32,12 @@ class TaskUpdate(BaseModel):
     timezone: str | None = Field(default=None, min_length=1, max_length=64)
     web_search_enabled: bool | None = None
     status: TaskStatus | None = None
+    execution_mode: ExecutionMode | None = None
+    llm_cache_ttl_seconds: int | None = Field(default=None, ge=0)
+    web_search_cache_ttl_seconds: int | None = Field(default=None, ge=0)
+    llm_hedge_after_seconds: float | None = Field(default=None, ge=0)
+    max_output_tokens: int | None = Field(default=None, ge=1)
+    jitter_seconds: int | None = Field(default=None, ge=0, le=86400)
 
 
 class TaskOut(BaseModel):
@@ -35,6 +48,12 @@ class TaskOut(BaseModel):
     timezone: str
     web_search_enabled: bool
     status: TaskStatus
+    execution_mode: ExecutionMode = "immediate"
+    llm_cache_ttl_seconds: int | None = None
+    web_search_cache_ttl_seconds: int | None = None
+    llm_hedge_after_seconds: float | None = None
+    max_output_tokens: int | None = None
+    jitter_seconds: int | None = None
     next_run_at: datetime | None
     created_at: datetime
     updated_at: datetime
@@ -43,3 +62,9 @@ class TaskOut(BaseModel):
         from_attributes = True
 
 
+class TaskScheduleOut(BaseModel):
+    task_id: str
+    cron_expression: str
+    timezone: str
+    # Upcoming fire times in UTC, jitter included (empty while the task is disabled).
+    fire_times: list[datetime]
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class UsageAggregate(BaseModel):
+    key: str | None  # task id / day (YYYY-MM-DD) / model, depending on the endpoint
+    label: str | None = None
+    runs: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cached_prompt_tokens: int = 0  # prompt tokens served from the provider's prefix cache
+    cost_estimate: float
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import threading
+
+import httpx
+import orjson
+
+from app.config import get_settings
+from app.services.llm import llm_target
+
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Batch states in which the provider is still working (we keep polling).
+PENDING_STATUSES = ("validating", "in_progress", "finalizing", "cancelling")
+
+
+class BatchAPIError(RuntimeError):
+    pass
+
+
+_CLIENT: httpx.Client | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _batch_target() -> tuple[str, str] | None:
+    """
+    (base_url, model) of the batch endpoint, or None when deferred tasks should run immediately.
+    """
+    settings = get_settings()
+    provider, model = llm_target()
+    if provider == "openai":
+        base_url = settings.llm_batch_base_url or (OPENAI_BASE_URL if settings.openai_api_key else None)
+        return (base_url.rstrip("/"), settings.llm_batch_model or model) if base_url else None
+    # The primary model belongs to another provider: an OpenAI-compatible batch API would reject
+    # it, so batching needs both the endpoint and its model spelled out.
+    if settings.llm_batch_base_url and settings.llm_batch_model:
+        return settings.llm_batch_base_url.rstrip("/"), settings.llm_batch_model
+    return None
+
+
+def batch_available() -> bool:
+    """
+    Deferred tasks are batched only when an OpenAI-compatible batch endpoint is configured
+    (OpenAI as primary provider with an API key, or LLM_BATCH_BASE_URL + LLM_BATCH_MODEL);
+    otherwise they run immediately.
+    """
+    return _batch_target() is not None
+
+
+def batch_model() -> str:
+    target = _batch_target()
+    if target is None:
+        raise BatchAPIError("No batch endpoint configured")
+    return target[1]
+
+
+def _get_client() -> httpx.Client:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT.is_closed:
+            settings = get_settings()
+            api_key = settings.llm_batch_api_key or settings.openai_api_key
+            target = _batch_target()
+            _CLIENT = httpx.Client(
+                base_url=target[0] if target else OPENAI_BASE_URL,
+                headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+                timeout=httpx.Timeout(120.0, connect=10.0),
+            )
+        return _CLIENT
+
+
+def close_client() -> None:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
+def _check(r: httpx.Response) -> httpx.Response:
+    if r.is_error:
+        raise BatchAPIError(f"Batch API {r.request.method} {r.request.url.path} -> {r.status_code}: {r.text[:500]}")
+    return r
+
+
+def build_request(*, custom_id: str, model: str, messages: list[dict], max_tokens: int) -> dict:
+    # Provider-default temperature, like the synchronous OpenAI path.
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": model, "messages": messages, "max_tokens": max_tokens},
+    }
+
+
+def submit_batch(requests: list[dict]) -> dict:
+    """
+    Upload the requests as a JSONL file and create a batch job.
+
+    Returns: the provider's batch object (id, status, input_file_id, ...).
+    """
+    client = _get_client()
+    content = b"\n".join(orjson.dumps(r) for r in requests) + b"\n"
+    file_obj = _check(
+        client.post("/files", data={"purpose": "batch"}, files={"file": ("runs.jsonl", content, "application/jsonl")})
+    ).json()
+    return _check(
+        client.post(
+            "/batches",
+            json={
+                "input_file_id": file_obj["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": get_settings().llm_batch_completion_window,
+            },
+        )
+    ).json()
+
+
+def get_batch(batch_id: str) -> dict:
+    return _check(_get_client().get(f"/batches/{batch_id}")).json()
+
+
+def download_results(file_id: str) -> list[dict]:
+    r = _check(_get_client().get(f"/files/{file_id}/content"))
+    return [orjson.loads(line) for line in r.content.splitlines() if line.strip()]
+
+
+def parse_result_line(line: dict) -> tuple[str, str | None, dict | None, str | None]:
+    """
+    Returns: (custom_id, message content, usage, error) for one line of an output/error file.
+    """
+    custom_id = str(line.get("custom_id") or "")
+    response = line.get("response") or {}
+    error = line.get("error")
+    if error:
+        return custom_id, None, None, str(error.get("message") if isinstance(error, dict) else error)
+    if int(response.get("status_code") or 200) >= 400:
+        return custom_id, None, None, f"HTTP {response.get('status_code')}: {str(response.get('body'))[:500]}"
+    body = response.get("body") or {}
+    choices = body.get("choices") or []
+    if not choices:
+        return custom_id, None, None, "Empty batch response"
+    content = (choices[0].get("message") or {}).get("content")
+    usage = body.get("usage") or None
+    if usage is not None:
+        usage = {
+            "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+            "completion_tokens": int(usage.get("completion_tokens") or 0),
+            "total_tokens": int(usage.get("total_tokens") or 0),
+            "cached_prompt_tokens": int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0),
+        }
+    return custom_id, content, usage, None
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import Settings, get_settings
+from app.models import Run, Task
+from app.utils.cron import bulk_fire_points, compute_next_run_at, jittered_next
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_CHUNK = 500
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back offset-less datetimes; they are stored in UTC.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _chunks(items: list[str]) -> Iterator[list[str]]:
+    for i in range(0, len(items), _CHUNK):
+        yield items[i : i + _CHUNK]
+
+
+def effective_jitter_seconds(task_jitter_seconds: int | None, *, settings: Settings) -> int:
+    # Callers pass settings read once: building Settings is far costlier than the cron math.
+    if task_jitter_seconds is None:
+        task_jitter_seconds = settings.scheduler_jitter_seconds
+    return max(0, int(task_jitter_seconds))
+
+
+def task_next_run_at(
+    *, task_id: str, cron_expression: str, tz: str, jitter_seconds: int | None, now: datetime, settings: Settings
+) -> datetime:
+    """
+    Task.next_run_at after `now`, jitter included. Raises for an invalid cron/timezone.
+    """
+    return compute_next_run_at(
+        cron_expression=cron_expression,
+        timezone=tz,
+        base_time_utc=now,
+        task_id=task_id,
+        jitter_seconds=effective_jitter_seconds(jitter_seconds, settings=settings),
+        jitter_mode=settings.scheduler_jitter_mode,
+    )
+
+
+def enqueue_runs(
+    s: Session,
+    task_ids: Iterable[str],
+    *,
+    now: datetime,
+    due_only: bool = False,
+    skip: Iterable[str] = (),
+) -> dict[str, datetime | None]:
+    """
+    Queue one run per enabled task and advance each task's next_run_at, as one bulk INSERT plus one
+    bulk UPDATE in the caller's transaction. Tasks in `skip` (missed fire times) are only advanced.
+    With `due_only`, tasks whose next_run_at is not yet due are left alone.
+
+    Returns: the new next_run_at of every task that was enqueued or advanced.
+    """
+    skip = set(skip)
+    ids = list(dict.fromkeys([*task_ids, *skip]))
+    rows = []
+    for chunk in _chunks(ids):
+        q = select(Task.id, Task.cron_expression, Task.timezone, Task.jitter_seconds).where(Task.id.in_(chunk), Task.status == "enabled")
+        if due_only:
+            q = q.where(Task.next_run_at <= now)
+        rows.extend(s.execute(q).all())
+    if not rows:
+        return {}
+
+    runs = [
+        {"id": str(uuid.uuid4()), "task_id": task_id, "scheduled_for": now, "status": "queued", "created_at": now, "updated_at": now}
+        for task_id, _, _, _ in rows
+        if task_id not in skip
+    ]
+    if runs:
+        s.execute(insert(Run), runs)
+
+    # Tasks sharing a schedule share its fire points, computed once; jitter only shifts them per
+    # task. Invalid cron/timezone -> None.
+    by_spec = bulk_fire_points(((cron, tz) for _, cron, tz, _ in rows), base_time_utc=now)
+    settings = get_settings()
+    next_runs: dict[str, datetime | None] = {}
+    for task_id, cron, tz, jitter in rows:
+        points = by_spec[(cron, tz)]
+        jitter = effective_jitter_seconds(jitter, settings=settings)
+        if points is None:
+            next_runs[task_id] = None
+        elif jitter > 0:
+            next_runs[task_id] = jittered_next(
+                points, base_time_utc=now, task_id=task_id, jitter_seconds=jitter, mode=settings.scheduler_jitter_mode
+            )
+        else:
+            next_runs[task_id] = points[1]
+    # One executemany UPDATE keyed on the primary key. Bulk statements bypass the Task mapper
+    # events, so this does not feed the scheduler change log.
+    s.execute(update(Task), [{"id": task_id, "next_run_at": nxt} for task_id, nxt in next_runs.items()])
+    return next_runs
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import Task, TaskChange
+from app.models.task_change import prune_task_changes
+from app.services.enqueue import as_utc, enqueue_runs
+from app.services.prefetch import prefetch_web_searches
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class HeapScheduler:
+    """
+    DB-driven scheduler: a min-heap of (next_run_at, task_id) read from the index on Task.next_run_at.
+
+    Only tasks due within the horizon are held in memory (refilled as time advances), so memory does
+    not grow with the number of tasks. Stale heap entries (task edited/disabled) are skipped lazily:
+    an entry is live only while it matches `_due[task_id]`.
+    """
+
+    def __init__(self, *, horizon_seconds: int, misfire_grace_seconds: int) -> None:
+        self.horizon = timedelta(seconds=max(60, horizon_seconds))
+        self.misfire_grace = timedelta(seconds=max(0, misfire_grace_seconds))
+        self._heap: list[tuple[datetime, str]] = []
+        self._due: dict[str, datetime] = {}
+        self._loaded_until: datetime | None = None
+        self._watermark = 0
+        self._last_full_load = 0.0
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _push(self, task_id: str, when: datetime | None) -> None:
+        if when is None:
+            self._due.pop(task_id, None)
+            return
+        when = as_utc(when)
+        if self._loaded_until is not None and when > self._loaded_until:
+            # Beyond the horizon: picked up by a later window refill.
+            self._due.pop(task_id, None)
+            return
+        self._due[task_id] = when
+        heapq.heappush(self._heap, (when, task_id))
+
+    def _load_window(self, *, after: datetime | None, until: datetime) -> None:
+        q = select(Task.id, Task.next_run_at).where(
+            Task.status == "enabled", Task.next_run_at.is_not(None), Task.next_run_at <= until
+        )
+        if after is not None:
+            q = q.where(Task.next_run_at > after)
+        with db_session() as s:
+            rows = s.execute(q).all()
+        self._loaded_until = until
+        for task_id, when in rows:
+            self._push(task_id, when)
+
+    def full_load(self, now: datetime) -> None:
+        with db_session() as s:
+            self._watermark = s.execute(select(func.max(TaskChange.seq))).scalar() or 0
+            prune_task_changes(s, now=now)
+        self._heap.clear()
+        self._due.clear()
+        self._loaded_until = None
+        self._load_window(after=None, until=now + self.horizon)
+        heapq.heapify(self._heap)
+        self._last_full_load = time.monotonic()
+
+    def refresh(self, now: datetime, *, full_every: float) -> None:
+        """
+        Apply logged task changes, extend the loaded window, and reload everything now and then.
+        """
+        if self._loaded_until is None or time.monotonic() - self._last_full_load >= full_every:
+            self.full_load(now)
+            return
+
+        with db_session() as s:
+            changes = s.execute(
+                select(TaskChange.seq, TaskChange.task_id).where(TaskChange.seq > self._watermark).order_by(TaskChange.seq)
+            ).all()
+            if changes:
+                task_ids = list({task_id for _, task_id in changes})
+                current = dict(
+                    s.execute(
+                        select(Task.id, Task.next_run_at).where(
+                            Task.id.in_(task_ids), Task.status == "enabled", Task.next_run_at.is_not(None)
+                        )
+                    ).all()
+                )
+                for task_id in task_ids:
+                    self._push(task_id, current.get(task_id))
+                self._watermark = changes[-1][0]
+
+        if now + self.horizon / 2 >= self._loaded_until:
+            self._load_window(after=self._loaded_until, until=now + self.horizon)
+
+    def fire_due(self, now: datetime) -> int:
+        """
+        Enqueue every task due at `now` in one transaction. Fire times missed by more than the
+        misfire grace (scheduler was down) are skipped, like APScheduler does.
+
+        Returns: number of runs enqueued.
+        """
+        due: list[str] = []
+        missed: list[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            when, task_id = heapq.heappop(self._heap)
+            if self._due.get(task_id) != when:
+                continue
+            del self._due[task_id]
+            (missed if when < now - self.misfire_grace else due).append(task_id)
+        if not due and not missed:
+            return 0
+
+        try:
+            with db_session() as s:
+                next_runs = enqueue_runs(s, due, now=now, due_only=True, skip=missed)
+        except Exception:
+            # Nothing was committed: keep the entries so the next pass retries them.
+            for task_id in (*due, *missed):
+                self._push(task_id, now)
+            raise
+        for task_id, when in next_runs.items():
+            self._push(task_id, when)
+        return len([task_id for task_id in due if task_id in next_runs])
+
+    def seconds_until_next(self, now: datetime) -> float | None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+
+def _interval_loop(stop: threading.Event, fn, seconds: float) -> None:  # type: ignore[no-untyped-def]
+    while not stop.wait(seconds):
+        try:
+            fn()
+        except Exception:
+            continue
+
+
+def run_heap_scheduler(stop: threading.Event | None = None) -> None:
+    """
+    SCHEDULER_ENGINE=heap: sleep until the earliest deadline (or the next change check), then
+    enqueue everything that is due.
+    """
+    settings = get_settings()
+    stop = stop or threading.Event()
+    check_every = max(1, int(settings.scheduler_interval))
+    full_every = max(60, int(settings.scheduler_full_resync_seconds))
+    scheduler = HeapScheduler(
+        horizon_seconds=int(settings.scheduler_heap_horizon_seconds),
+        misfire_grace_seconds=int(settings.scheduler_misfire_grace_seconds),
+    )
+
+    prefetch_lead = int(settings.web_search_prefetch_lead_seconds)
+    if prefetch_lead > 0:
+        threading.Thread(
+            target=_interval_loop,
+            args=(stop, prefetch_web_searches, max(5, min(60, prefetch_lead // 2))),
+            name="prefetch",
+            daemon=True,
+        ).start()
+
+    last_refresh = 0.0
+    while not stop.is_set():
+        now = _utcnow()
+        if time.monotonic() - last_refresh >= check_every:
+            try:
+                scheduler.refresh(now, full_every=full_every)
+            except Exception:
+                pass
+            last_refresh = time.monotonic()
+        try:
+            scheduler.fire_due(now)
+        except Exception:
+            # Retried on the next pass (see fire_due).
+            pass
+        wait = scheduler.seconds_until_next(_utcnow())
+        stop.wait(min(check_every, wait if wait is not None else check_every))
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+from app.services.llm_schema import TableResult, coerce_cell
+
+
+_FENCE_RE = re.compile(r"```[A-Za-z]*\s*")
+_LITERALS = {"True": "true", "False": "false", "None": "null", "NaN": "null", "undefined": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+_TYPE_ALIASES = {
+    "str": "string",
+    "text": "string",
+    "int": "number",
+    "integer": "number",
+    "float": "number",
+    "double": "number",
+    "decimal": "number",
+    "numeric": "number",
+    "bool": "boolean",
+    "datetime": "date",
+    "timestamp": "date",
+    "time": "date",
+    "link": "url",
+    "uri": "url",
+}
+
+
+class JSONRepairError(ValueError):
+    pass
+
+
+def _largest_object(text: str) -> str:
+    """
+    Return the longest top-level `{...}` span (string aware). An object that never closes
+    (truncated output) runs to the end of the text.
+    """
+    best = ""
+    depth = 0
+    start = -1
+    in_string = False
+    quote = ""
+    escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                in_string = False
+            continue
+        if ch in "\"'" and depth > 0:
+            in_string, quote = True, ch
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0 and i + 1 - start > len(best):
+                best = text[start : i + 1]
+    if depth > 0 and len(text) - start > len(best):
+        best = text[start:]
+    if not best:
+        raise JSONRepairError("No JSON object found in LLM output")
+    return best
+
+
+def repair_json_text(text: str) -> Any:
+    """
+    Deterministically repair near-miss JSON: code fences, prose around the object, single quotes,
+    Python literals, raw newlines in strings, trailing commas and truncated output.
+    """
+    candidate = _largest_object(_FENCE_RE.sub("", text or ""))
+
+    out: list[str] = []
+    stack: list[str] = []
+    # (output length, open containers) at each top-level-of-container comma: safe truncation points.
+    cut_points: list[tuple[int, tuple[str, ...]]] = []
+    in_string = False
+    quote = ""
+    escape = False
+    i = 0
+    while i < len(candidate):
+        ch = candidate[i]
+        if in_string:
+            if escape:
+                if ch == "'":
+                    out.pop()  # \' is not a valid JSON escape
+                out.append(ch)
+                escape = False
+            elif ch == "\\":
+                out.append(ch)
+                escape = True
+            elif ch == quote:
+                out.append('"')
+                in_string = False
+            elif ch == '"':
+                out.append('\\"')  # double quote inside a single-quoted string
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\r":
+                pass
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            in_string, quote = True, ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            # Trailing comma before a closer.
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if stack and _CLOSERS[stack[-1]] == ch:
+                stack.pop()
+                out.append(ch)
+        elif ch == ",":
+            cut_points.append((len(out), tuple(stack)))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < len(candidate) and (candidate[j].isalnum() or candidate[j] == "_"):
+                j += 1
+            word = candidate[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+
+    def _close(body: str, open_stack: tuple[str, ...]) -> str:
+        body = body.rstrip().rstrip(",").rstrip()
+        if body.endswith(":"):
+            body += " null"
+        return body + "".join(_CLOSERS[c] for c in reversed(open_stack))
+
+    text_out = "".join(out)
+    attempts = [(text_out, tuple(stack))] + [(text_out[:pos], st) for pos, st in reversed(cut_points)]
+    last_error: Exception | None = None
+    # Truncated output: close what is open; if the tail is a half-written member, cut back to the
+    # previous comma and try again.
+    for body, open_stack in attempts[:50]:
+        try:
+            return json.loads(_close(body, open_stack))
+        except json.JSONDecodeError as e:
+            last_error = e
+    raise JSONRepairError(f"Could not repair LLM JSON: {last_error}")
+
+
+def normalize_columns(raw: Any) -> list[dict]:
+    """
+    Column list with common type aliases mapped (integer -> number, ...) and missing labels filled.
+    """
+    columns: list[dict] = []
+    for col in raw if isinstance(raw, list) else []:
+        if isinstance(col, str):
+            col = {"key": col}
+        if not isinstance(col, dict) or not col.get("key"):
+            continue
+        key = str(col["key"])
+        col_type = str(col.get("type") or "string").strip().lower()
+        columns.append(
+            {
+                "key": key,
+                "label": str(col.get("label") or key.replace("_", " ").title()),
+                "type": _TYPE_ALIASES.get(col_type, col_type),
+            }
+        )
+    return columns
+
+
+def repair_table_result(text: str) -> TableResult:
+    return repair_table_data(repair_json_text(text))
+
+
+def repair_table_data(data: Any) -> TableResult:
+    """
+    TableResult from already-decoded JSON, with the same leniency as `repair_table_result`.
+    """
+    if not isinstance(data, dict):
+        raise JSONRepairError("LLM output is not a JSON object")
+
+    columns = normalize_columns(data.get("columns"))
+    types = {c["key"]: c["type"] for c in columns}
+    rows = data.get("rows")
+    if isinstance(rows, dict):
+        rows = [rows]
+    fixed_rows: list[dict] = []
+    for row in rows if isinstance(rows, list) else []:
+        if isinstance(row, list):
+            # Positional row: map onto declared column order.
+            row = dict(zip(types, row))
+        if isinstance(row, dict):
+            fixed_rows.append({k: coerce_cell(v, types.get(k, "string")) for k, v in row.items()})
+
+    summary = data.get("summary")
+    return TableResult.model_validate(
+        {"columns": columns, "rows": fixed_rows, "summary": summary if summary is None else str(summary)}
+    )
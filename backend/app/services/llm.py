@@ -1,27 +1,54 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, TypeVar
 
-from tenacity import retry, stop_after_attempt, wait_fixed
-from tenacity import RetryError
+from tenacity import retry, wait_exponential_jitter
+from tenacity import RetryCallState
 from tenacity import retry_if_not_exception_type
 
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from pydantic import ValidationError
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.services import metrics, rate_limit
+from app.services.json_repair import repair_table_result
 from app.services.llm_schema import TableResult
+from app.services.llm_stream import IncrementalTableChecker
+from app.services.prompt_assembly import estimate_tokens
+
+
+T = TypeVar("T")
 
 
 class LLMConfigError(RuntimeError):
     pass
 
 
+class LLMOutputError(RuntimeError):
+    """
+    The model answered, but neither the parser nor the local repair pass produced a valid table.
+    Retried (a fresh generation may succeed), unlike config errors.
+    """
+
+
+class LLMTruncatedError(LLMOutputError):
+    """
+    The model stopped at the output budget; the retry gets a doubled budget.
+    """
+
+
 def _utcnow_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -37,8 +64,7 @@ def _mock_llm(*, task_name: str) -> TableResult:
     )
 
 
-def _build_langchain_model(*, provider: str, model: str):
-    settings = get_settings()
+def _build_langchain_model(*, provider: str, model: str, settings: Settings):
     if provider == "openai":
         if not settings.openai_api_key:
             raise LLMConfigError("OPENAI_API_KEY not set (LLM_PROVIDER=openai)")
@@ -46,7 +72,10 @@ def _build_langchain_model(*, provider: str, model: str):
             model=model,
             api_key=settings.openai_api_key,
             temperature=1,
-            max_tokens=2000,
+            max_tokens=settings.llm_max_output_tokens,
+            stream_usage=True,
+            # Retries (with backoff and Retry-After) are ours, see call_model.
+            max_retries=0,
         )
 
     if provider == "deepseek":
@@ -57,7 +86,10 @@ def _build_langchain_model(*, provider: str, model: str):
             api_key=settings.deepseek_api_key,
             base_url=settings.deepseek_base_url,
             temperature=0.0,
-            max_tokens=2000,
+            max_tokens=settings.llm_max_output_tokens,
+            stream_usage=True,
+            # Retries (with backoff and Retry-After) are ours, see call_model.
+            max_retries=0,
         )
 
     if provider == "gemini":
@@ -67,64 +99,514 @@ def _build_langchain_model(*, provider: str, model: str):
             model=model,
             google_api_key=settings.gemini_api_key,
             temperature=0.0,
-            max_output_tokens=2000,
+            max_output_tokens=settings.llm_max_output_tokens,
+            # Retries (with backoff and Retry-After) are ours, see call_model.
+            max_retries=0,
         )
 
     raise RuntimeError(f"Unsupported LLM_PROVIDER={provider}")
 
 
-def generate_structured_table(
+# Built chat models keep their HTTP connection pools, so we reuse them across runs.
+_MODEL_REGISTRY: dict[tuple, object] = {}
+_CHAIN_REGISTRY: dict[tuple, object] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _model_key(*, provider: str, model: str, settings: Settings) -> tuple:
+    # Every setting that goes into the client is part of the key, so config changes
+    # (new key, new base URL) naturally build a fresh client. Keys are hashed, not stored.
+    api_key = {
+        "openai": settings.openai_api_key,
+        "deepseek": settings.deepseek_api_key,
+        "gemini": settings.gemini_api_key,
+    }.get(provider) or ""
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    base_url = settings.deepseek_base_url if provider == "deepseek" else None
+    return (provider, model, key_hash, base_url)
+
+
+def get_langchain_model(*, provider: str, model: str):
+    settings = get_settings()
+    key = _model_key(provider=provider, model=model, settings=settings)
+    with _REGISTRY_LOCK:
+        llm = _MODEL_REGISTRY.get(key)
+        if llm is None:
+            llm = _build_langchain_model(provider=provider, model=model, settings=settings)
+            _MODEL_REGISTRY[key] = llm
+        return llm
+
+
+def _output_limit_kwargs(*, provider: str, max_output_tokens: int) -> dict:
+    if provider == "gemini":
+        return {"generation_config": {"max_output_tokens": max_output_tokens}}
+    return {"max_tokens": max_output_tokens}
+
+
+def _get_chain(*, provider: str, model: str, max_output_tokens: int | None = None):
+    # Takes ready-made messages (see `_messages`), so there is no per-call prompt formatting.
+    key = (*_model_key(provider=provider, model=model, settings=get_settings()), max_output_tokens)
+    with _REGISTRY_LOCK:
+        chain = _CHAIN_REGISTRY.get(key)
+    if chain is None:
+        chain = get_langchain_model(provider=provider, model=model)
+        if max_output_tokens:
+            chain = chain.bind(**_output_limit_kwargs(provider=provider, max_output_tokens=max_output_tokens))
+        with _REGISTRY_LOCK:
+            chain = _CHAIN_REGISTRY.setdefault(key, chain)
+    return chain
+
+
+def reset_llm_clients() -> None:
+    """
+    Drop all cached chat models/chains (e.g. after rotating API keys).
+    """
+    with _REGISTRY_LOCK:
+        _MODEL_REGISTRY.clear()
+        _CHAIN_REGISTRY.clear()
+
+
+@lru_cache(maxsize=1)
+def _table_parser() -> PydanticOutputParser:
+    return PydanticOutputParser(pydantic_object=TableResult)
+
+
+@lru_cache(maxsize=1)
+def table_format_instructions() -> str:
+    return _table_parser().get_format_instructions()
+
+
+@lru_cache(maxsize=4)
+def _system_message(system_prompt: str) -> SystemMessage:
+    """
+    System prompt + table format instructions, built once per process.
+
+    This is the large static prefix of every request: it must stay byte-identical across runs, tasks
+    and packed calls so providers can serve it from their prompt cache. Everything that varies
+    (task prompt, web results, packing instructions) goes into the human message after it.
+    """
+    return SystemMessage(content=f"{system_prompt}\n\n{table_format_instructions()}")
+
+
+def _messages(*, system_prompt: str, user_prompt: str) -> list[BaseMessage]:
+    return [_system_message(system_prompt), HumanMessage(content=user_prompt)]
+
+
+def chat_messages(*, system_prompt: str, user_prompt: str) -> list[dict]:
+    """
+    The exact messages a synchronous call sends, as OpenAI chat-completions dicts (used for batch requests).
+    """
+    role = {"system": "system", "human": "user", "ai": "assistant"}
+    return [{"role": role[m.type], "content": m.content} for m in _messages(system_prompt=system_prompt, user_prompt=user_prompt)]
+
+
+def _as_int(value: object) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _cached_prompt_tokens(usage: dict, raw: dict) -> int | None:
+    # Prompt tokens the provider served from its prefix cache (billed at the cached-input price).
+    details = usage.get("input_token_details") or {}
+    cached = _as_int(details.get("cache_read"))
+    if cached is None:
+        cached = _as_int((raw.get("prompt_tokens_details") or {}).get("cached_tokens"))  # OpenAI
+    if cached is None:
+        cached = _as_int(raw.get("prompt_cache_hit_tokens"))  # DeepSeek
+    if cached is None:
+        cached = _as_int(raw.get("cached_content_token_count"))  # Gemini
+    return cached
+
+
+def extract_token_usage(msg: object) -> dict | None:
+    """
+    Normalize provider token counts to {prompt_tokens, completion_tokens, total_tokens}, plus
+    cached_prompt_tokens when the provider reports prompt-cache hits.
+
+    LangChain fills the provider-agnostic `usage_metadata` for OpenAI/DeepSeek/Gemini; older or
+    partial responses only carry the raw provider fields in `response_metadata`.
+    """
+    usage = getattr(msg, "usage_metadata", None) or {}
+    meta = getattr(msg, "response_metadata", None) or {}
+    raw = meta.get("token_usage") or meta.get("usage_metadata") or {}
+    prompt = _as_int(usage.get("input_tokens"))
+    completion = _as_int(usage.get("output_tokens"))
+    total = _as_int(usage.get("total_tokens"))
+
+    if prompt is None and completion is None:
+        prompt = _as_int(raw.get("prompt_tokens", raw.get("prompt_token_count")))
+        completion = _as_int(raw.get("completion_tokens", raw.get("candidates_token_count")))
+        total = _as_int(raw.get("total_tokens", raw.get("total_token_count")))
+
+    if prompt is None and completion is None and total is None:
+        return None
+    if total is None:
+        total = (prompt or 0) + (completion or 0)
+    out = {"prompt_tokens": prompt or 0, "completion_tokens": completion or 0, "total_tokens": total}
+    cached = _cached_prompt_tokens(usage, raw)
+    if cached is not None:
+        out["cached_prompt_tokens"] = cached
+    return out
+
+
+def _add_usage(total: dict | None, usage: dict | None) -> dict | None:
+    # Key-wise sum of two extract_token_usage() results (either may be None).
+    if not usage:
+        return total
+    if not total:
+        return dict(usage)
+    return {key: total.get(key, 0) + usage.get(key, 0) for key in {**total, **usage}}
+
+
+def llm_targets() -> list[tuple[str, str]]:
+    """
+    Ordered (provider, model) chain: LLM_PROVIDER_CHAIN ("openai:gpt-4o-mini,deepseek:deepseek-chat")
+    or just LLM_PROVIDER + DEFAULT_LLM_MODEL. Entries without ":model" use DEFAULT_LLM_MODEL.
+    """
+    settings = get_settings()
+    targets: list[tuple[str, str]] = []
+    for entry in (settings.llm_provider_chain or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        provider, _, model = entry.partition(":")
+        targets.append((provider.strip().lower(), model.strip() or settings.default_llm_model))
+    return targets or [((settings.llm_provider or "mock").lower(), settings.default_llm_model)]
+
+
+def llm_target() -> tuple[str, str]:
+    """
+    Returns: (provider, model) of the primary target.
+    """
+    return llm_targets()[0]
+
+
+@dataclass
+class LLMResult:
+    table: TableResult
+    token_usage: dict | None = None
+    llm_model: str | None = None
+    # Per-call timings in ms (llm_ms, ttfb_ms when streaming, parse_ms) and call details.
+    timings: dict = field(default_factory=dict)
+    cache_hit: bool = False
+
+
+def _chunk_text(chunk: object) -> str:
+    content = getattr(chunk, "content", "") or ""
+    if isinstance(content, list):
+        # Some providers stream content as a list of parts.
+        return "".join(p if isinstance(p, str) else str(p.get("text", "")) for p in content)
+    return content
+
+
+def _invoke(chain, inputs: list[BaseMessage], *, stream: bool, timings: dict):  # type: ignore[no-untyped-def]
+    started = time.perf_counter()
+    if not stream:
+        msg = chain.invoke(inputs)
+        timings["llm_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return msg
+
+    timings.pop("ttfb_ms", None)
+    checker = IncrementalTableChecker()
+    msg = None
+    for chunk in chain.stream(inputs):
+        text = _chunk_text(chunk)
+        if text and "ttfb_ms" not in timings:
+            timings["ttfb_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        # Merging chunks also merges usage_metadata from the final chunk.
+        msg = chunk if msg is None else msg + chunk
+        # Raising here closes the stream, so a bad generation stops costing time/tokens.
+        checker.feed(text)
+    timings["llm_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return msg
+
+
+def parse_or_repair(text: str, *, timings: dict) -> TableResult:
+    """
+    Parse the model output; on failure run the local JSON repair pass before paying for another call.
+    """
+    try:
+        table = _table_parser().parse(text)
+        timings["repair"] = None
+        return table
+    except (ValueError, ValidationError) as parse_error:
+        try:
+            table = repair_table_result(text)
+        except (ValueError, ValidationError) as repair_error:
+            timings["repair"] = "failed"
+            metrics.incr("llm_repair.failed")
+            raise LLMOutputError(f"Invalid LLM output: {parse_error}; repair failed: {repair_error}") from repair_error
+        timings["repair"] = "ok"
+        metrics.incr("llm_repair.ok")
+        return table
+
+
+_BACKOFF = wait_exponential_jitter(initial=1, max=30, jitter=1)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    cap = float(get_settings().llm_retry_max_wait_seconds)
+    delay = rate_limit.retry_after(exc) if exc is not None else None
+    if delay is not None:
+        # Honour the provider's hint; the jitter spreads workers that got the same one.
+        return min(cap, delay + random.uniform(0, 1))
+    return min(cap, _BACKOFF(retry_state))
+
+
+# Attempts for invalid/truncated output (transient provider errors get LLM_MAX_ATTEMPTS).
+_OUTPUT_ATTEMPTS = 2
+
+
+def _retry_stop(retry_state: RetryCallState) -> bool:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if exc is not None and rate_limit.is_transient(exc):
+        return retry_state.attempt_number >= max(1, int(get_settings().llm_max_attempts))
+    return retry_state.attempt_number >= _OUTPUT_ATTEMPTS
+
+
+def _estimate_tokens(inputs: list[BaseMessage], *, max_output_tokens: int) -> int:
+    # Prompt estimate plus the whole output allowance.
+    return sum(estimate_tokens(str(m.content)) for m in inputs) + max_output_tokens
+
+
+def _is_truncated(msg: object) -> bool:
+    reason = (getattr(msg, "response_metadata", None) or {}).get("finish_reason")
+    # OpenAI/DeepSeek report "length", Gemini a FinishReason.MAX_TOKENS enum (or its name).
+    return str(getattr(reason, "name", reason) or "").upper() in {"LENGTH", "MAX_TOKENS"}
+
+
+def call_model(
     *,
+    provider: str,
+    model: str,
     system_prompt: str,
     user_prompt: str,
-    task_name: str,
-) -> tuple[TableResult, dict | None, str | None]:
+    parse: Callable[..., T],
+    max_output_tokens: int | None = None,
+) -> tuple[T, dict | None, dict]:
     """
-    Returns: (TableResult, token_usage, llm_model)
+    One logical LLM call (rate limited, retried) whose text is turned into a value by `parse(text, timings=)`.
+
+    Returns: (parsed value, token usage summed over all attempts, timings)
     """
     settings = get_settings()
-    provider = (settings.llm_provider or "mock").lower()
-
-    if provider == "mock":
-        return _mock_llm(task_name=task_name), None, None
+    stream = bool(settings.llm_streaming)
+    budget = int(max_output_tokens or settings.llm_max_output_tokens)
+    timings: dict = {"streamed": stream, "attempts": 0, "max_output_tokens": budget}
+    limiter = rate_limit.concurrency_limiter(provider=provider, model=model)
+    # Truncated and invalid responses are billed too, so every attempt's usage counts.
+    spent: dict[str, dict | None] = {"usage": None}
 
     @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_fixed(1),
+        stop=_retry_stop,
+        wait=_retry_wait,
         reraise=True,
-        # Don't retry on schema/empty-output errors; those are prompt/model behavior, not transient.
-        retry=retry_if_not_exception_type((LLMConfigError, ValidationError, ValueError)),
+        # Unparseable output is first repaired locally (parse_or_repair); only if that fails is the
+        # LLM called again (LLMOutputError). Aborted streams are retried too.
+        retry=retry_if_not_exception_type(
+            (LLMConfigError, ValidationError, ValueError, rate_limit.RateLimitTimeout)
+        ),
     )
-    def _attempt() -> TableResult:
-        llm = _build_langchain_model(provider=provider, model=settings.default_llm_model)
-
+    def _attempt() -> T:
+        timings["attempts"] += 1
+        if timings.get("truncated"):
+            # Never shrink an explicit override that is already above the cap.
+            doubled = min(2 * timings["max_output_tokens"], int(settings.llm_output_budget_max))
+            timings["max_output_tokens"] = max(timings["max_output_tokens"], doubled)
         # Enforce JSON via parser instructions + parse.
         # NOTE: We intentionally avoid model-native structured output here because
         # some providers/tooling tend to return `{}` for dict-typed fields like rows[*],
         # resulting in "empty tables". The explicit JSON prompt produces better filled values.
-        parser = PydanticOutputParser(pydantic_object=TableResult)
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", "{system_prompt}\n\n{format_instructions}"),
-                ("human", "{user_prompt}"),
-            ]
-        )
-        chain = prompt | llm
-        msg = chain.invoke(
-            {
-                "system_prompt": system_prompt,
-                "user_prompt": user_prompt,
-                "format_instructions": parser.get_format_instructions(),
-            }
+        chain = _get_chain(provider=provider, model=model, max_output_tokens=timings["max_output_tokens"])
+        inputs = _messages(system_prompt=system_prompt, user_prompt=user_prompt)
+        reserved = _estimate_tokens(inputs, max_output_tokens=timings["max_output_tokens"])
+        with limiter.slot():
+            waited = rate_limit.acquire(provider=provider, model=model, tokens=reserved)
+            if waited:
+                timings["rate_limit_wait_ms"] = round(timings.get("rate_limit_wait_ms", 0) + waited * 1000, 1)
+            try:
+                msg = _invoke(chain, inputs, stream=stream, timings=timings)
+            except Exception as e:
+                # No response, so nothing of the reservation was used.
+                rate_limit.refund(provider=provider, model=model, tokens=reserved)
+                if rate_limit.is_overloaded(e):
+                    limiter.on_overload()
+                    metrics.incr("llm_retry.overloaded")
+                raise
+            limiter.on_success()
+        token_usage = extract_token_usage(msg)
+        if token_usage:
+            rate_limit.refund(provider=provider, model=model, tokens=reserved - token_usage["total_tokens"])
+            spent["usage"] = _add_usage(spent["usage"], token_usage)
+        if _is_truncated(msg):
+            timings["truncated"] = timings.get("truncated", 0) + 1
+            metrics.incr("llm_output.truncated")
+            # Retry with a larger budget; on the last attempt, let the repair pass salvage what it can.
+            if timings["attempts"] < _OUTPUT_ATTEMPTS:
+                raise LLMTruncatedError(f"LLM output truncated at {timings['max_output_tokens']} tokens")
+        text = _chunk_text(msg)
+        parse_started = time.perf_counter()
+        parsed = parse(text, timings=timings)
+        timings["parse_ms"] = round((time.perf_counter() - parse_started) * 1000, 2)
+        return parsed
+
+    started = time.perf_counter()
+    parsed = _attempt()
+    _record_latency(provider=provider, model=model, seconds=time.perf_counter() - started)
+    timings["provider"] = provider
+    return parsed, spent["usage"], timings
+
+
+def _generate_with(
+    *,
+    provider: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    max_output_tokens: int | None = None,
+) -> LLMResult:
+    table, token_usage, timings = call_model(
+        provider=provider,
+        model=model,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        parse=parse_or_repair,
+        max_output_tokens=max_output_tokens,
+    )
+    return LLMResult(table=table, token_usage=token_usage, llm_model=f"{provider}:{model}", timings=timings)
+
+
+# Recent successful call latencies per provider:model, for the learned hedge deadline.
+_LATENCIES: dict[str, deque[float]] = {}
+_LATENCY_LOCK = threading.Lock()
+_MIN_LATENCY_SAMPLES = 20
+
+# Hedged/fallback calls run here so the caller can wait on whichever finishes first; see hedge_pool.
+_HEDGE_POOL: ThreadPoolExecutor | None = None
+_HEDGE_POOL_LOCK = threading.Lock()
+
+
+def hedge_pool(*, slots: int | None = None) -> ThreadPoolExecutor:
+    """
+    The hedge pool, created on first use for `slots` concurrent callers (default WORKER_CONCURRENCY):
+    each may have its whole provider chain in flight at once.
+    """
+    global _HEDGE_POOL
+    with _HEDGE_POOL_LOCK:
+        if _HEDGE_POOL is None:
+            slots = max(1, int(slots or get_settings().worker_concurrency))
+            _HEDGE_POOL = ThreadPoolExecutor(max_workers=slots * max(1, len(llm_targets())), thread_name_prefix="llm-hedge")
+        return _HEDGE_POOL
+
+
+def _record_latency(*, provider: str, model: str, seconds: float) -> None:
+    with _LATENCY_LOCK:
+        _LATENCIES.setdefault(f"{provider}:{model}", deque(maxlen=200)).append(seconds)
+
+
+def latency_p95(*, provider: str, model: str) -> float | None:
+    with _LATENCY_LOCK:
+        samples = sorted(_LATENCIES.get(f"{provider}:{model}", ()))
+    if len(samples) < _MIN_LATENCY_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def _hedge_deadline(*, primary: tuple[str, str], hedge_after_seconds: float | None) -> float | None:
+    if hedge_after_seconds is None:
+        hedge_after_seconds = get_settings().llm_hedge_after_seconds
+    if hedge_after_seconds and hedge_after_seconds > 0:
+        return float(hedge_after_seconds)
+    if get_settings().llm_hedge_use_p95:
+        return latency_p95(provider=primary[0], model=primary[1])
+    return None
+
+
+def _record_saved_latency(loser: Future, *, won_at: float) -> None:
+    # Latency saved = how much later the primary would have answered than the hedge that won.
+    def _done(f: Future) -> None:
+        if not f.cancelled() and f.exception() is None:
+            metrics.incr("llm_hedge.saved_ms", int((time.perf_counter() - won_at) * 1000))
+
+    loser.add_done_callback(_done)
+
+
+def generate_structured_table(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    task_name: str,
+    hedge_after_seconds: float | None = None,
+    max_output_tokens: int | None = None,
+) -> LLMResult:
+    """
+    Call the provider chain: the primary first; the next provider on failure, or (hedging) as soon as
+    the primary has not answered within the deadline (per task, LLM_HEDGE_AFTER_SECONDS, or the
+    primary's learned p95). The first valid TableResult wins.
+    """
+    targets = llm_targets()
+    if targets[0][0] == "mock":
+        return LLMResult(table=_mock_llm(task_name=task_name))
+
+    def _call(target: tuple[str, str]) -> LLMResult:
+        return _generate_with(
+            provider=target[0],
+            model=target[1],
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            max_output_tokens=max_output_tokens,
         )
-        text = getattr(msg, "content", "") or ""
-        return parser.parse(text)
 
-    table = _attempt()
-    return table, None, settings.default_llm_model
+    if len(targets) == 1:
+        return _call(targets[0])
+
+    deadline = _hedge_deadline(primary=targets[0], hedge_after_seconds=hedge_after_seconds)
+    if deadline is not None:
+        metrics.incr("llm_hedge.eligible")
+
+    pool = hedge_pool()
+    started = time.perf_counter()
+    pending: dict[Future, tuple[str, str]] = {pool.submit(_call, targets[0]): targets[0]}
+    next_idx = 1
+    hedged = False
+    last_error: BaseException | None = None
+    while pending:
+        timeout = None
+        if deadline is not None and not hedged and next_idx < len(targets):
+            timeout = max(0.0, started + deadline - time.perf_counter())
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            hedged = True
+            metrics.incr("llm_hedge.fired")
+            pending[pool.submit(_call, targets[next_idx])] = targets[next_idx]
+            next_idx += 1
+            continue
+
+        for fut in done:
+            target = pending.pop(fut)
+            try:
+                result = fut.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if target != targets[0]:
+                metrics.incr("llm_hedge.won" if hedged else "llm_fallback.used")
+                for loser, loser_target in pending.items():
+                    if loser_target == targets[0]:
+                        _record_saved_latency(loser, won_at=time.perf_counter())
+            result.timings["hedged"] = hedged
+            return result
 
+        if not pending and next_idx < len(targets):
+            # Everything in flight failed: fall back to the next provider.
+            pending[pool.submit(_call, targets[next_idx])] = targets[next_idx]
+            next_idx += 1
 
-def stringify_for_web_results(obj: object) -> str:
-    return json.dumps(obj, ensure_ascii=False, indent=2)
+    assert last_error is not None
+    raise last_error
 
 
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import timedelta
+
+from sqlalchemy import delete, select
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import LLMCacheEntry
+from app.models.base import utcnow
+from app.services import metrics
+from app.services.llm import LLMResult, generate_structured_table, llm_target, table_format_instructions
+from app.services.llm_schema import TableResult
+from app.services.singleflight import SingleFlight
+
+
+def llm_cache_key(
+    *,
+    provider: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    format_instructions: str,
+) -> str:
+    payload = json.dumps(
+        [provider, model, system_prompt, user_prompt, format_instructions],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_table(key: str) -> tuple[TableResult, str | None] | None:
+    now = utcnow()
+    with db_session() as s:
+        entry = s.execute(
+            select(LLMCacheEntry).where(LLMCacheEntry.key == key, LLMCacheEntry.expires_at > now)
+        ).scalar_one_or_none()
+        if entry is None:
+            return None
+        entry.last_used_at = now
+        entry.hit_count += 1
+        s.add(entry)
+        table, llm_model = entry.table, entry.llm_model
+
+    try:
+        return TableResult.model_validate(table), llm_model
+    except ValueError:
+        # Schema changed since the entry was written; treat as a miss.
+        return None
+
+
+def store_cached_table(
+    *,
+    key: str,
+    provider: str,
+    model: str,
+    table: TableResult,
+    llm_model: str | None,
+    ttl_seconds: int,
+) -> None:
+    now = utcnow()
+    max_entries = max(1, int(get_settings().llm_cache_max_entries))
+    with db_session() as s:
+        entry = s.get(LLMCacheEntry, key) or LLMCacheEntry(key=key, provider=provider, model=model, hit_count=0)
+        entry.table = table.model_dump()
+        entry.llm_model = llm_model
+        entry.expires_at = now + timedelta(seconds=ttl_seconds)
+        entry.last_used_at = now
+        s.add(entry)
+        s.flush()
+
+        # Expired entries first, then least recently used ones beyond the size bound.
+        s.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now))
+        overflow = select(LLMCacheEntry.key).order_by(LLMCacheEntry.last_used_at.desc()).offset(max_entries)
+        s.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(overflow)))
+
+
+# Runs with identical prompts firing at the same moment share one in-flight LLM call.
+_LLM_FLIGHTS = SingleFlight()
+
+
+def cached_generate_structured_table(
+    *,
+    system_prompt: str,
+    user_prompt: str,
+    task_name: str,
+    ttl_seconds: int,
+    hedge_after_seconds: float | None = None,
+    max_output_tokens: int | None = None,
+) -> LLMResult:
+    """
+    `generate_structured_table` behind a SQLite response cache (disabled when ttl_seconds <= 0)
+    and in-process single-flight deduplication.
+    """
+    provider, model = llm_target()
+    def _generate() -> LLMResult:
+        return generate_structured_table(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            task_name=task_name,
+            hedge_after_seconds=hedge_after_seconds,
+            max_output_tokens=max_output_tokens,
+        )
+
+    if provider == "mock":
+        return _generate()
+
+    key = llm_cache_key(
+        provider=provider,
+        model=model,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        format_instructions=table_format_instructions(),
+    )
+    use_cache = ttl_seconds > 0
+    if use_cache:
+        cached = get_cached_table(key)
+        if cached is not None:
+            metrics.incr("llm_cache.hit")
+            table, llm_model = cached
+            return LLMResult(table=table, llm_model=llm_model, cache_hit=True)
+        metrics.incr("llm_cache.miss")
+
+    result, shared = _LLM_FLIGHTS.do(key, _generate)
+    if shared:
+        # Tokens were spent (and accounted) by the run that made the call.
+        metrics.incr("singleflight.llm.shared")
+        return LLMResult(table=result.table, llm_model=result.llm_model, timings={"shared_call": True})
+
+    if use_cache:
+        store_cached_table(
+            key=key,
+            provider=provider,
+            model=model,
+            table=result.table,
+            llm_model=result.llm_model,
+            ttl_seconds=ttl_seconds,
+        )
+    return result
@@ -1,14 +1,66 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, model_validator
 
 
+ColumnType = Literal["string", "number", "date", "url", "boolean"]
+
+_TRUE_STRINGS = {"true", "yes", "y", "1"}
+_FALSE_STRINGS = {"false", "no", "n", "0"}
+
+
+def coerce_cell(value: Any, col_type: str) -> Any:
+    """
+    Best-effort conversion of a cell to its declared column type; unconvertible values are kept.
+    """
+    if value is None:
+        return None
+    if col_type == "number":
+        if isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str):
+            raw = value.strip().replace(",", "").replace("_", "")
+            try:
+                return int(raw)
+            except ValueError:
+                pass
+            try:
+                return float(raw)
+            except ValueError:
+                return value
+        return value
+    if col_type == "boolean":
+        if isinstance(value, str):
+            low = value.strip().lower()
+            if low in _TRUE_STRINGS:
+                return True
+            if low in _FALSE_STRINGS:
+                return False
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and value in (0, 1):
+            return bool(value)
+        return value
+    # string / url / date are JSON strings.
+    if isinstance(value, (bool, int, float)):
+        return str(value).lower() if isinstance(value, bool) else str(value)
+    return value
+
+
+# Python types that already match each column type (exact types: bool is not a number here).
+_NATIVE_TYPES: dict[str, frozenset[type]] = {
+    "string": frozenset({str}),
+    "url": frozenset({str}),
+    "date": frozenset({str}),
+    "number": frozenset({int, float}),
+    "boolean": frozenset({bool}),
+}
+
+
 class TableColumn(BaseModel):
     key: str = Field(min_length=1)
     label: str = Field(min_length=1)
-    type: Literal["string", "number", "date", "url", "boolean"]
+    type: ColumnType
 
 
 class TableResult(BaseModel):
@@ -19,33 +71,33 @@ class TableResult(BaseModel):
     @model_validator(mode="after")
     def _normalize_rows(self) -> "TableResult":
         """
-        Ensure each row has every declared column key (fill missing as null),
-        matching the PRD rule: unknown data -> nulls.
+        Single pass over the rows: fill missing declared keys with null (PRD rule: unknown data -> nulls),
+        coerce cells to their column type, and reject "empty tables" (all values null/empty).
+
+        Rows are updated in place: pydantic already copied them out of the input while validating.
         """
-        keys = [c.key for c in self.columns]
-        normalized: list[dict] = []
-        for row in self.rows:
-            out = dict(row or {})
-            for k in keys:
-                out.setdefault(k, None)
-            normalized.append(out)
-        self.rows = normalized
-
-        # Reject "empty tables" (all values null/empty across all rows)
         if not self.columns or not self.rows:
             raise ValueError("LLM produced an empty table (no columns or no rows)")
-        all_empty = True
-        for row in self.rows:
-            for k in keys:
-                v = row.get(k)
-                if v is not None and v != "":
-                    all_empty = False
-                    break
-            if not all_empty:
-                break
-        if all_empty:
-            raise ValueError("LLM produced an empty table (all cells were null/empty)")
-
-        return self
 
+        spec = [(c.key, c.type, _NATIVE_TYPES[c.type]) for c in self.columns]
+        has_value = False
+        rows = self.rows
+        for i, row in enumerate(rows):
+            if not row:
+                rows[i] = dict.fromkeys(k for k, _, _ in spec)
+                continue
+            for key, col_type, native in spec:
+                v = row.get(key)
+                if v is None:
+                    row[key] = None
+                    continue
+                # Values that already have the column's JSON type (the common case) skip coercion.
+                if type(v) not in native:
+                    v = coerce_cell(v, col_type)
+                    row[key] = v
+                if not has_value and v != "":
+                    has_value = True
 
+        if not has_value:
+            raise ValueError("LLM produced an empty table (all cells were null/empty)")
+        return self
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.services.json_repair import normalize_columns
+from app.services.llm_schema import TableColumn
+
+
+class LLMStreamAborted(RuntimeError):
+    """
+    The streamed output is clearly not a TableResult; the generation was stopped early.
+    Retried like any other invalid output (see LLMOutputError).
+    """
+
+
+# Text tolerated before the JSON object (code fence, a short preamble the repair pass strips).
+_MAX_PREFIX_CHARS = 200
+
+_COLUMNS_ADAPTER = TypeAdapter(list[TableColumn])
+
+
+class IncrementalTableChecker:
+    """
+    Scans streamed JSON text chunk by chunk (string/escape aware, no full re-parse) and fails fast:
+    - when no JSON object starts within the first _MAX_PREFIX_CHARS characters,
+    - as soon as the top-level `columns` array is complete but invalid or empty.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.columns_ok = False
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: str | None = None
+        self._current_key: str | None = None
+        self._columns_start: int | None = None
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                elif i >= _MAX_PREFIX_CHARS:
+                    raise LLMStreamAborted("LLM output does not start with a JSON object")
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1 : i]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._depth == 1:
+                self._current_key = self._last_string
+            elif ch == "," and self._depth == 1:
+                self._current_key = None
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._current_key == "columns":
+                    self._columns_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "]" and self._depth == 1 and self._columns_start is not None:
+                    self._check_columns(text[self._columns_start : i + 1])
+                    self._columns_start = None
+            i += 1
+        self._pos = i
+
+    def _check_columns(self, raw: str) -> None:
+        try:
+            # Same leniency as the repair stage (e.g. "integer" -> "number"), so we only abort
+            # on output that repair could not save either.
+            columns = _COLUMNS_ADAPTER.validate_python(normalize_columns(json.loads(raw)))
+        except (ValueError, ValidationError) as e:
+            raise LLMStreamAborted(f"LLM output has invalid columns: {e}") from e
+        if not columns:
+            raise LLMStreamAborted("LLM output has no columns")
+        self.columns_ok = True
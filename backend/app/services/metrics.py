@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.database import db_session
+from app.models import MetricCounter
+from app.models.base import utcnow
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """
+    Add `amount` to a persisted counter (shared by all processes via SQLite).
+    Best-effort: metrics must never fail a run.
+    """
+    now = utcnow()
+    stmt = insert(MetricCounter).values(name=name, value=amount, created_at=now, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MetricCounter.name],
+        set_={"value": MetricCounter.value + amount, "updated_at": now},
+    )
+    try:
+        with db_session() as s:
+            s.execute(stmt)
+    except Exception:
+        pass
+
+
+def get_counters(*, prefix: str | None = None) -> dict[str, int]:
+    with db_session() as s:
+        q = select(MetricCounter.name, MetricCounter.value).order_by(MetricCounter.name)
+        if prefix:
+            q = q.where(MetricCounter.name.startswith(prefix))
+        return {name: int(value) for name, value in s.execute(q).all()}
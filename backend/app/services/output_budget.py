@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import math
+
+from sqlalchemy import desc, func, select
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import Run
+
+# Budgets are rounded up to this step so the chain registry only ever holds a few bound variants.
+BUDGET_STEP = 256
+
+
+def round_budget(tokens: int) -> int:
+    return max(BUDGET_STEP, int(math.ceil(tokens / BUDGET_STEP)) * BUDGET_STEP)
+
+
+def _p99(values: list[int]) -> int:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(len(values) * 0.99)) - 1)]
+
+
+def output_token_budget(*, task_id: str, override: int | None = None) -> int:
+    """
+    max_tokens for the next run of a task: the task override, else p99 of the completion tokens of
+    its recent successful runs times LLM_OUTPUT_BUDGET_HEADROOM (clamped to [min, max]), else
+    LLM_MAX_OUTPUT_TOKENS while there is not enough history.
+    """
+    settings = get_settings()
+    if override:
+        return int(override)
+
+    completion = func.json_extract(Run.token_usage, "$.completion_tokens")
+    with db_session() as s:
+        samples = [
+            int(v)
+            for v in s.execute(
+                select(completion)
+                .where(Run.task_id == task_id, Run.status == "success", completion.is_not(None))
+                .order_by(desc(Run.scheduled_for))
+                .limit(max(1, int(settings.llm_output_budget_window)))
+            ).scalars()
+        ]
+    if len(samples) < max(1, int(settings.llm_output_budget_min_samples)):
+        return int(settings.llm_max_output_tokens)
+
+    budget = _p99(samples) * float(settings.llm_output_budget_headroom)
+    budget = min(float(settings.llm_output_budget_max), max(float(settings.llm_output_budget_min), budget))
+    return round_budget(int(budget))
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import Run, Task
+from app.prompts.templates import build_packed_user_prompt
+from app.services import metrics
+from app.services.json_repair import repair_json_text, repair_table_data
+from app.services.llm import LLMOutputError, call_model, generate_structured_table, llm_target
+from app.services.llm_schema import TableResult
+
+
+@dataclass
+class PackedResult:
+    # run id -> table, None where the sub-result was missing or invalid.
+    tables: dict[str, TableResult | None]
+    # run id -> that run's share of the call's token usage.
+    token_usage: dict[str, dict] = field(default_factory=dict)
+    llm_model: str | None = None
+    timings: dict = field(default_factory=dict)
+
+
+def pack_groups(run_ids: list[str]) -> list[list[str]]:
+    """
+    Split claimed runs into packs of compatible runs (same cron + timezone, short prompt, no web
+    search, no response cache), at most WORKER_PACKING_MAX_RUNS each. Other runs, and runs released
+    from a failed pack, are singletons.
+    """
+    settings = get_settings()
+    max_runs = max(1, int(settings.worker_packing_max_runs))
+    max_chars = int(settings.worker_packing_max_prompt_chars)
+    with db_session() as s:
+        rows = s.execute(
+            select(
+                Run.id, Task.cron_expression, Task.timezone, Task.prompt, Task.web_search_enabled, Task.llm_cache_ttl_seconds, Run.stats
+            )
+            .join(Task, Task.id == Run.task_id)
+            .where(Run.id.in_(run_ids))
+        ).all()
+
+    singles: list[list[str]] = []
+    buckets: dict[tuple[str, str], list[str]] = defaultdict(list)
+    for run_id, cron, tz, prompt, web, cache_ttl, stats in rows:
+        if web or len(prompt) > max_chars or (cache_ttl or 0) > 0 or (stats or {}).get("packable") is False:
+            singles.append([run_id])
+        else:
+            buckets[(cron, tz)].append(run_id)
+
+    groups = list(singles)
+    for ids in buckets.values():
+        groups.extend(ids[i : i + max_runs] for i in range(0, len(ids), max_runs))
+    return groups
+
+
+def _parse_packed(aliases: list[str]):  # type: ignore[no-untyped-def]
+    def _parse(text: str, *, timings: dict) -> dict[str, TableResult | None]:
+        try:
+            data = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            try:
+                data = repair_json_text(text)
+            except ValueError as e:
+                raise LLMOutputError(f"Invalid packed LLM output: {e}") from e
+        results = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(results, dict):
+            raise LLMOutputError("Packed LLM output has no `results` object")
+
+        tables: dict[str, TableResult | None] = {}
+        for alias in aliases:
+            raw = results.get(alias)
+            try:
+                tables[alias] = TableResult.model_validate(raw)
+            except (ValueError, ValidationError):
+                try:
+                    tables[alias] = repair_table_data(raw)
+                except (ValueError, ValidationError):
+                    tables[alias] = None
+        timings["packed_invalid"] = sum(1 for t in tables.values() if t is None)
+        return tables
+
+    return _parse
+
+
+def _split_usage(usage: dict, *, prompt_weights: dict[str, int], completion_weights: dict[str, int]) -> dict[str, dict]:
+    def _shares(total: int, weights: dict[str, int]) -> dict[str, int]:
+        weight_sum = sum(weights.values()) or 1
+        shares = {k: total * w // weight_sum for k, w in weights.items()}
+        # Rounding remainder goes to the first run so the shares add up to the call's usage.
+        first = next(iter(shares))
+        shares[first] += total - sum(shares.values())
+        return shares
+
+    prompt = _shares(int(usage.get("prompt_tokens") or 0), prompt_weights)
+    completion = _shares(int(usage.get("completion_tokens") or 0), completion_weights)
+    out = {
+        k: {"prompt_tokens": prompt[k], "completion_tokens": completion[k], "total_tokens": prompt[k] + completion[k]}
+        for k in prompt_weights
+    }
+    if "cached_prompt_tokens" in usage:
+        for k, cached in _shares(int(usage["cached_prompt_tokens"] or 0), prompt_weights).items():
+            out[k]["cached_prompt_tokens"] = min(cached, out[k]["prompt_tokens"])
+    return out
+
+
+def generate_packed_tables(
+    *,
+    system_prompt: str,
+    prompts: dict[str, str],
+    task_names: dict[str, str],
+    max_output_tokens: int,
+) -> PackedResult:
+    """
+    Answer several runs' prompts with a single LLM call (primary target only; no hedging).
+    Runs are addressed by short aliases in the prompt to keep it small.
+    """
+    provider, model = llm_target()
+    if provider == "mock":
+        tables = {
+            run_id: generate_structured_table(system_prompt=system_prompt, user_prompt=prompt, task_name=task_names[run_id]).table
+            for run_id, prompt in prompts.items()
+        }
+        return PackedResult(tables=tables)
+
+    aliases = {f"r{i + 1}": run_id for i, run_id in enumerate(prompts)}
+    tables, usage, timings = call_model(
+        provider=provider,
+        model=model,
+        system_prompt=system_prompt,
+        user_prompt=build_packed_user_prompt({alias: prompts[run_id] for alias, run_id in aliases.items()}),
+        parse=_parse_packed(list(aliases)),
+        max_output_tokens=max_output_tokens,
+    )
+    metrics.incr("llm_packing.calls")
+    metrics.incr("llm_packing.runs", len(aliases))
+
+    by_run = {aliases[alias]: table for alias, table in tables.items()}
+    token_usage: dict[str, dict] = {}
+    if usage:
+        token_usage = _split_usage(
+            usage,
+            prompt_weights={run_id: len(prompt) + 1 for run_id, prompt in prompts.items()},
+            completion_weights={
+                run_id: len(table.model_dump_json()) if table is not None else 1 for run_id, table in by_run.items()
+            },
+        )
+    return PackedResult(tables=by_run, token_usage=token_usage, llm_model=f"{provider}:{model}", timings=timings)
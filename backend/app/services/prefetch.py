@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, desc, select, update
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import Task, WebSearchSnapshot
+from app.services.web_search_cache import cached_web_search, search_cache_key, task_search_query
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _prefetch_one(task: dict) -> None:
+    query = task_search_query(task_name=task["name"], task_prompt=task["prompt"])
+    ttl = task["web_search_cache_ttl_seconds"]
+    if ttl is None:
+        ttl = get_settings().web_search_cache_ttl_seconds
+    try:
+        results, fetched_at, from_cache = cached_web_search(query=query, max_results=5, ttl_seconds=int(ttl))
+    except Exception:
+        # The run will simply search itself.
+        return
+
+    with db_session() as s:
+        s.add(
+            WebSearchSnapshot(
+                run_id=None,
+                task_id=task["id"],
+                prefetched_for=task["next_run_at"],
+                query=query,
+                results=results,
+                cache_key=search_cache_key(query=query, max_results=5),
+                fetched_at=fetched_at,
+                from_cache=from_cache,
+            )
+        )
+
+
+def prefetch_web_searches() -> None:
+    """
+    Fetch web results for runs firing within the next WEB_SEARCH_PREFETCH_LEAD_SECONDS and store
+    them as pending snapshots (run_id NULL), so the run can call the LLM right away.
+    """
+    lead = int(get_settings().web_search_prefetch_lead_seconds)
+    if lead <= 0:
+        return
+    now = _utcnow()
+
+    with db_session() as s:
+        # Drop prefetches nobody picked up (task disabled, run skipped, ...).
+        s.execute(
+            delete(WebSearchSnapshot).where(
+                WebSearchSnapshot.run_id.is_(None),
+                WebSearchSnapshot.prefetched_for < now - timedelta(seconds=2 * lead),
+            )
+        )
+
+        already = select(WebSearchSnapshot.id).where(
+            WebSearchSnapshot.task_id == Task.id,
+            WebSearchSnapshot.prefetched_for == Task.next_run_at,
+        )
+        due = s.execute(
+            select(Task.id, Task.name, Task.prompt, Task.next_run_at, Task.web_search_cache_ttl_seconds).where(
+                Task.status == "enabled",
+                Task.web_search_enabled.is_(True),
+                Task.next_run_at.is_not(None),
+                Task.next_run_at > now,
+                Task.next_run_at <= now + timedelta(seconds=lead),
+                ~already.exists(),
+            )
+        ).all()
+
+    if not due:
+        return
+    with ThreadPoolExecutor(max_workers=min(8, len(due)), thread_name_prefix="prefetch") as pool:
+        list(pool.map(_prefetch_one, [row._asdict() for row in due]))
+
+
+def claim_prefetched_snapshot(*, task_id: str, run_id: str, scheduled_for: datetime) -> list[dict] | None:
+    """
+    Attach the pending prefetch made for this fire time (if any) to the run and return its results.
+    """
+    lead = int(get_settings().web_search_prefetch_lead_seconds)
+    if lead <= 0:
+        return None
+    window = timedelta(seconds=max(60, lead))
+
+    with db_session() as s:
+        candidate = (
+            select(WebSearchSnapshot.id)
+            .where(
+                WebSearchSnapshot.task_id == task_id,
+                WebSearchSnapshot.run_id.is_(None),
+                WebSearchSnapshot.prefetched_for.between(scheduled_for - window, scheduled_for + window),
+            )
+            .order_by(desc(WebSearchSnapshot.prefetched_for))
+            .limit(1)
+        )
+        # Conditional update so two workers can never attach the same prefetch.
+        return s.execute(
+            update(WebSearchSnapshot)
+            .where(WebSearchSnapshot.id.in_(candidate), WebSearchSnapshot.run_id.is_(None))
+            .values(run_id=run_id)
+            .returning(WebSearchSnapshot.results)
+            .execution_options(synchronize_session=False)
+        ).scalar()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from app.config import get_settings
+
+
+def _price_for(model: str, prices: dict[str, dict[str, float]]) -> dict[str, float] | None:
+    if model in prices:
+        return prices[model]
+    # Allow dated/suffixed variants (e.g. "gpt-4o-mini-2024-07-18") to use the base entry.
+    matches = [name for name in prices if model.startswith(name)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(*, llm_model: str | None, token_usage: dict | None, batch: bool = False) -> float | None:
+    """
+    USD estimate from LLM_PRICES (per 1M tokens), times LLM_BATCH_PRICE_FACTOR for batch jobs.
+    None when the model or usage is unknown.
+    """
+    if not llm_model or not token_usage:
+        return None
+    # llm_model is recorded as "provider:model".
+    settings = get_settings()
+    price = _price_for(llm_model.partition(":")[2] or llm_model, settings.llm_prices)
+    if price is None:
+        return None
+    prompt = int(token_usage.get("prompt_tokens") or 0)
+    completion = int(token_usage.get("completion_tokens") or 0)
+    cached = min(prompt, int(token_usage.get("cached_prompt_tokens") or 0))
+    input_price = float(price.get("input", 0.0))
+    cost = (
+        (prompt - cached) * input_price
+        + cached * float(price.get("cached_input", input_price))
+        + completion * float(price.get("output", 0.0))
+    )
+    if batch:
+        cost *= float(settings.llm_batch_price_factor)
+    return round(cost / 1_000_000, 8)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.prompts.templates import wrap_web_results
+
+_WS = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+# Snippets cut to fit the budget still need to say something.
+_MIN_SNIPPET_TOKENS = 24
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate (~4 characters per token for English/JSON); no tokenizer download needed.
+    """
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class WebResultsBlock:
+    text: str
+    tokens: int
+    # Versus the previous pretty-printed, unfiltered block.
+    tokens_saved: int
+    results_used: int
+    results_dropped: int
+
+
+def _clean(value: object) -> str:
+    return _WS.sub(" ", str(value or "")).strip()
+
+
+def _url_key(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower().removeprefix("www."), parts.path.rstrip("/"), query, ""))
+
+
+def _dedupe(results: list[dict]) -> list[dict]:
+    seen_urls: set[str] = set()
+    # (normalized snippet, output item carrying it)
+    seen_snippets: list[tuple[str, dict]] = []
+    out: list[dict] = []
+    for item in results:
+        title, url, snippet = _clean(item.get("title")), _clean(item.get("url")), _clean(item.get("snippet"))
+        if url:
+            key = _url_key(url)
+            if key in seen_urls:
+                continue
+            seen_urls.add(key)
+        norm = snippet.lower()
+        # Syndicated copies often differ only by a prefix/suffix; keep the longer text once.
+        if norm and any(norm in other for other, _ in seen_snippets):
+            snippet = ""
+        elif norm:
+            for other, kept in seen_snippets:
+                if other in norm:
+                    kept["snippet"] = ""
+            seen_snippets = [(other, kept) for other, kept in seen_snippets if other not in norm]
+        if not (title or snippet):
+            continue
+        entry = {"title": title, "url": url, "snippet": snippet}
+        out.append(entry)
+        if snippet:
+            seen_snippets.append((norm, entry))
+    # An earlier item may have lost its snippet to a longer copy.
+    return [entry for entry in out if entry["title"] or entry["snippet"]]
+
+
+def _rank(results: list[dict], *, query: str | None) -> list[dict]:
+    if not query:
+        return results
+    terms = {w for w in _WORD.findall(query.lower()) if len(w) > 2}
+    if not terms:
+        return results
+
+    def _score(pair: tuple[int, dict]) -> tuple[int, int]:
+        idx, item = pair
+        words = set(_WORD.findall(f"{item['title']} {item['snippet']}".lower()))
+        # Provider order (relevance) breaks ties.
+        return (-len(terms & words), idx)
+
+    return [item for _, item in sorted(enumerate(results), key=_score)]
+
+
+def _encode(items: list[dict]) -> str:
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+
+
+def _truncate(text: str, *, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return f"{cut}…"
+
+
+def build_web_results_block(
+    results: list[dict],
+    *,
+    token_budget: int,
+    max_snippet_tokens: int,
+    query: str | None = None,
+) -> WebResultsBlock | None:
+    """
+    Compact <WEB_RESULTS> block: whitespace-free JSON, duplicate URLs/snippets removed, results ranked
+    by overlap with the query and trimmed/dropped to stay within `token_budget` (0 = unlimited).
+    """
+    if not results:
+        return None
+    legacy_tokens = estimate_tokens(wrap_web_results(json.dumps(results, ensure_ascii=False, indent=2)))
+
+    ranked = _rank(_dedupe(results), query=query)
+    items: list[dict] = []
+    remaining = token_budget if token_budget > 0 else None
+    overhead = estimate_tokens(wrap_web_results("[]"))
+    if remaining is not None:
+        remaining -= overhead
+    for item in ranked:
+        if max_snippet_tokens > 0:
+            item["snippet"] = _truncate(item["snippet"], max_tokens=max_snippet_tokens)
+        if not item["url"]:
+            del item["url"]
+        cost = estimate_tokens(_encode([item])) + 1
+        if remaining is not None and cost > remaining:
+            # Cut the snippet to whatever is left, if that still leaves a useful amount.
+            spare = remaining - (cost - estimate_tokens(item["snippet"]))
+            if spare < _MIN_SNIPPET_TOKENS:
+                continue
+            item["snippet"] = _truncate(item["snippet"], max_tokens=spare - 1)
+            cost = estimate_tokens(_encode([item])) + 1
+        items.append(item)
+        if remaining is not None:
+            remaining -= cost
+
+    if not items:
+        return None
+    text = wrap_web_results(_encode(items))
+    tokens = estimate_tokens(text)
+    return WebResultsBlock(
+        text=text,
+        tokens=tokens,
+        tokens_saved=max(0, legacy_tokens - tokens),
+        results_used=len(items),
+        results_dropped=len(results) - len(items),
+    )
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from app.config import get_settings
+from app.database import db_session
+from app.models import RateLimitBucket
+from app.services import metrics
+
+
+class RateLimitTimeout(RuntimeError):
+    """
+    The provider budget would not free up within LLM_RATE_LIMIT_MAX_WAIT_SECONDS.
+    """
+
+
+def _limits_for(*, provider: str, model: str) -> dict:
+    limits = get_settings().llm_rate_limits or {}
+    return limits.get(f"{provider}:{model}") or limits.get(provider) or {}
+
+
+def _refilled(*, capacity: float, per_second: float, now: float):  # type: ignore[no-untyped-def]
+    return func.min(capacity, RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * per_second)
+
+
+def _take(key: str, *, cost: float, capacity: float, per_second: float) -> float:
+    """
+    Atomically take `cost` tokens from a bucket shared by all processes.
+
+    Returns: 0.0 on success, otherwise the seconds until enough tokens will have refilled.
+    """
+    now = time.time()
+    refilled = _refilled(capacity=capacity, per_second=per_second, now=now)
+    with db_session() as s:
+        s.execute(
+            insert(RateLimitBucket)
+            .values(key=key, tokens=capacity, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[RateLimitBucket.key])
+        )
+        taken = s.execute(
+            update(RateLimitBucket)
+            .where(RateLimitBucket.key == key, refilled >= cost)
+            .values(tokens=refilled - cost, updated_at=now)
+            .returning(RateLimitBucket.key)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        if taken is not None:
+            return 0.0
+        available = s.execute(select(refilled).where(RateLimitBucket.key == key)).scalar() or 0.0
+    return max(0.01, (cost - available) / per_second)
+
+
+def acquire(*, provider: str, model: str, tokens: int) -> float:
+    """
+    Block until one request of ~`tokens` tokens fits the RPM/TPM budget configured for provider:model
+    (LLM_RATE_LIMITS). No-op without a configured budget.
+
+    Returns: seconds spent waiting.
+    """
+    limits = _limits_for(provider=provider, model=model)
+    if not limits:
+        return 0.0
+    deadline = time.monotonic() + float(get_settings().llm_rate_limit_max_wait_seconds)
+    waited = 0.0
+    for kind, cost in (("rpm", 1.0), ("tpm", float(tokens))):
+        per_minute = float(limits.get(kind) or 0)
+        if per_minute <= 0:
+            continue
+        # A request larger than the whole bucket must still be able to go through once it is full.
+        cost = min(cost, per_minute)
+        while True:
+            delay = _take(f"{provider}:{model}:{kind}", cost=cost, capacity=per_minute, per_second=per_minute / 60)
+            if delay <= 0:
+                break
+            if time.monotonic() + delay > deadline:
+                raise RateLimitTimeout(f"{kind.upper()} budget for {provider}:{model} exhausted")
+            # Jittered and capped, so waiting workers do not hit the bucket in lockstep.
+            delay = min(delay, 5.0) * random.uniform(1.0, 1.2)
+            time.sleep(delay)
+            waited += delay
+    if waited:
+        metrics.incr("llm_rate_limit.waited_ms", int(waited * 1000))
+    return waited
+
+
+def refund(*, provider: str, model: str, tokens: int) -> None:
+    """
+    Give back tokens reserved by `acquire` but not used (estimate minus actual usage).
+    """
+    per_minute = float(_limits_for(provider=provider, model=model).get("tpm") or 0)
+    if per_minute <= 0 or tokens <= 0:
+        return
+    with db_session() as s:
+        s.execute(
+            update(RateLimitBucket)
+            .where(RateLimitBucket.key == f"{provider}:{model}:tpm")
+            .values(tokens=func.min(per_minute, RateLimitBucket.tokens + tokens))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_overloaded(exc: BaseException) -> bool:
+    """
+    429 / quota exhausted or a timeout: the provider wants less traffic from us.
+    """
+    if _status_code(exc) == 429 or isinstance(exc, TimeoutError):
+        return True
+    name = type(exc).__name__
+    return name in {"RateLimitError", "ResourceExhausted", "TooManyRequests", "DeadlineExceeded"} or "Timeout" in name
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    Worth retrying with backoff: overload, 5xx, dropped connections.
+    """
+    if is_overloaded(exc):
+        return True
+    status = _status_code(exc)
+    if status is not None and status >= 500:
+        return True
+    name = type(exc).__name__
+    return name in {"APIConnectionError", "InternalServerError", "ServiceUnavailable", "ConnectError", "RemoteProtocolError"}
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """
+    Seconds the provider asked us to wait (Retry-After / retry-after-ms headers), if any.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    raw_ms = headers.get("retry-after-ms")
+    if raw_ms:
+        try:
+            return max(0.0, float(raw_ms) / 1000)
+        except ValueError:
+            pass
+    raw = headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(raw) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight calls: grows by ~1 per `limit` successes, halves on overload
+    (at most once per second, so one burst of 429s counts as a single signal).
+    """
+
+    def __init__(self, *, initial: float, minimum: float, maximum: float) -> None:
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._last_decrease = 0.0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_overload(self) -> None:
+        now = time.monotonic()
+        with self._cond:
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            self.limit = max(self.minimum, self.limit / 2)
+        metrics.incr("llm_concurrency.decreased")
+
+
+_LIMITERS: dict[str, AdaptiveConcurrency] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def concurrency_limiter(*, provider: str, model: str) -> AdaptiveConcurrency:
+    key = f"{provider}:{model}"
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            settings = get_settings()
+            limiter = AdaptiveConcurrency(
+                initial=settings.llm_max_concurrency,
+                minimum=settings.llm_min_concurrency,
+                maximum=settings.llm_max_concurrency,
+            )
+            _LIMITERS[key] = limiter
+        return limiter
@@ -1,90 +1,271 @@
 from __future__ import annotations
 
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
+from functools import lru_cache
 
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from app.config import get_settings
 from app.database import db_session
-from app.models import Run, Task
-from app.utils.cron import compute_next_run_at
+from app.models import Task, TaskChange
+from app.models.task_change import prune_task_changes
+from app.services.enqueue import effective_jitter_seconds, enqueue_runs
+from app.services.heap_scheduler import run_heap_scheduler
+from app.services.prefetch import prefetch_web_searches
+from app.utils.cron import compiled_cron, compute_next_run_at, zone
 
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+class _EnqueueBuffer:
+    """
+    Coalesces cron firings that land within `window_seconds` of each other (e.g. every hourly task
+    at :00) into one transaction: a bulk Run insert plus a bulk next_run_at update.
+    """
+
+    def __init__(self, *, window_seconds: float) -> None:
+        self.window = window_seconds
+        self._lock = threading.Lock()
+        self._pending: list[str] = []
+        self._last_fired_at: datetime | None = None
+        self._timer: threading.Timer | None = None
+
+    def add(self, task_id: str, fired_at: datetime) -> None:
+        self._add([task_id], fired_at)
+
+    def _add(self, task_ids: list[str], fired_at: datetime) -> None:
+        with self._lock:
+            self._pending.extend(task_ids)
+            if self._last_fired_at is None or fired_at > self._last_fired_at:
+                self._last_fired_at = fired_at
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """
+        Returns: number of runs enqueued.
+        """
+        with self._lock:
+            task_ids, fired_at = self._pending, self._last_fired_at
+            self._pending, self._last_fired_at = [], None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not task_ids or fired_at is None:
+            return 0
+        try:
+            with db_session() as s:
+                # The latest firing of the window: next fire times must lie after every buffered
+                # firing (with jitter, they are spread across the window).
+                return len(enqueue_runs(s, task_ids, now=fired_at))
+        except Exception:
+            # Nothing was committed (e.g. "database is locked" at :00): keep the firings and retry
+            # with the next window, like HeapScheduler.fire_due re-pushes its entries.
+            self._add(task_ids, fired_at)
+            raise
+
+
+# Set by run_scheduler_loop when SCHEDULER_ENQUEUE_WINDOW_MS > 0.
+_BUFFER: _EnqueueBuffer | None = None
+
+
 def _enqueue_run(task_id: str) -> None:
     now = _utcnow()
+    if _BUFFER is not None:
+        _BUFFER.add(task_id, now)
+        return
     with db_session() as s:
-        task = s.get(Task, task_id)
-        if not task or task.status != "enabled":
-            return
+        enqueue_runs(s, [task_id], now=now)
 
-        # Enqueue a run at "now" (APScheduler guarantees schedule; we record scheduled_for for debugging).
-        s.add(Run(task_id=task.id, scheduled_for=now, status="queued"))
 
-        # Keep next_run_at roughly accurate for UI.
-        try:
-            task.next_run_at = compute_next_run_at(
-                cron_expression=task.cron_expression,
-                timezone=task.timezone,
-                base_time_utc=now,
-            )
-        except Exception:
-            task.next_run_at = None
+@lru_cache(maxsize=1024)
+def _trigger(cron_expression: str, tz_name: str) -> CronTrigger:
+    # Triggers are immutable, so tasks sharing a schedule share one.
+    return CronTrigger.from_crontab(cron_expression, timezone=zone(tz_name))
 
 
-def _sync_jobs(scheduler: BlockingScheduler) -> None:
+class _JitteredTrigger(BaseTrigger):
     """
-    Reconcile DB tasks -> APScheduler jobs so task edits take effect without restarts.
+    A task's cron schedule with each firing shifted by its jitter offset; fire times are the same
+    ones written to Task.next_run_at.
     """
-    with db_session() as s:
-        tasks = s.execute(select(Task)).scalars().all()
 
-    desired: dict[str, Task] = {t.id: t for t in tasks if t.status == "enabled"}
-    existing_ids = {job.id for job in scheduler.get_jobs()}
+    def __init__(self, *, task_id: str, cron_expression: str, tz_name: str, jitter_seconds: int, mode: str) -> None:
+        compiled_cron(cron_expression, tz_name)  # Raises for an invalid cron/timezone.
+        self.task_id = task_id
+        self.cron_expression = cron_expression
+        self.tz_name = tz_name
+        self.jitter_seconds = jitter_seconds
+        self.mode = mode
 
-    # Remove jobs for disabled/deleted tasks
-    for job_id in list(existing_ids):
-        if job_id not in desired:
-            scheduler.remove_job(job_id)
+    def get_next_fire_time(self, previous_fire_time: datetime | None, now: datetime) -> datetime | None:
+        return compute_next_run_at(
+            cron_expression=self.cron_expression,
+            timezone=self.tz_name,
+            base_time_utc=previous_fire_time or now,
+            task_id=self.task_id,
+            jitter_seconds=self.jitter_seconds,
+            jitter_mode=self.mode,
+        )
 
-    # Add or update jobs for enabled tasks
-    for task_id, task in desired.items():
-        try:
-            tz = ZoneInfo(task.timezone)
-            trigger = CronTrigger.from_crontab(task.cron_expression, timezone=tz)
-        except Exception:
-            # Invalid cron/timezone in DB: skip scheduling, leave task as-is.
-            continue
 
-        if task_id not in existing_ids:
-            scheduler.add_job(_enqueue_run, trigger=trigger, args=[task_id], id=task_id, max_instances=1)
+@dataclass
+class _SyncState:
+    # Highest TaskChange.seq already applied (None -> full resync needed).
+    watermark: int | None = None
+    last_full_sync: float = 0.0
+    # task id -> (cron_expression, timezone, jitter_seconds, jitter_mode) the job was scheduled with.
+    specs: dict[str, tuple[str, str, int, str]] = field(default_factory=dict)
+
+
+def _apply_task(scheduler: BlockingScheduler, state: _SyncState, task_id: str, spec: tuple[str, str, int, str] | None) -> None:
+    """
+    Bring one task's job in line with `spec` (None = disabled/deleted); no-op when unchanged.
+    """
+    if spec is None:
+        if state.specs.pop(task_id, None) is not None:
+            try:
+                scheduler.remove_job(task_id)
+            except JobLookupError:
+                pass
+        return
+    if state.specs.get(task_id) == spec:
+        return
+
+    cron_expression, tz_name, jitter_seconds, jitter_mode = spec
+    try:
+        if jitter_seconds > 0:
+            trigger: BaseTrigger = _JitteredTrigger(
+                task_id=task_id,
+                cron_expression=cron_expression,
+                tz_name=tz_name,
+                jitter_seconds=jitter_seconds,
+                mode=jitter_mode,
+            )
         else:
-            # Update trigger if changed
-            scheduler.reschedule_job(task_id, trigger=trigger)
+            trigger = _trigger(cron_expression, tz_name)
+    except Exception:
+        # Invalid cron/timezone in DB: skip scheduling, leave task as-is.
+        return
+
+    if task_id in state.specs:
+        scheduler.reschedule_job(task_id, trigger=trigger)
+    else:
+        scheduler.add_job(_enqueue_run, trigger=trigger, args=[task_id], id=task_id, max_instances=1, replace_existing=True)
+    state.specs[task_id] = spec
+
+
+def _schedule_specs(s, task_ids: list[str] | None = None) -> dict[str, tuple[str, str, int, str]]:  # type: ignore[no-untyped-def]
+    q = select(Task.id, Task.cron_expression, Task.timezone, Task.jitter_seconds).where(Task.status == "enabled")
+    if task_ids is not None:
+        q = q.where(Task.id.in_(task_ids))
+    settings = get_settings()
+    specs = {}
+    for task_id, cron, tz, jitter in s.execute(q).all():
+        jitter_seconds = effective_jitter_seconds(jitter, settings=settings)
+        # The mode only matters for jittered tasks; keeping it out of the others' specs means a mode
+        # change (picked up on a full resync) only reschedules the jittered ones.
+        specs[task_id] = (cron, tz, jitter_seconds, settings.scheduler_jitter_mode if jitter_seconds > 0 else "")
+    return specs
+
+
+def _full_sync(scheduler: BlockingScheduler, state: _SyncState) -> None:
+    with db_session() as s:
+        # Watermark first: changes committed during the scan are simply applied again next tick.
+        watermark = s.execute(select(func.max(TaskChange.seq))).scalar() or 0
+        desired = _schedule_specs(s)
+        prune_task_changes(s, now=_utcnow())
+
+    for job in scheduler.get_jobs():
+        if not job.id.startswith("_") and job.id not in desired:
+            state.specs.setdefault(job.id, ("", "", 0, ""))
+    for task_id in list(state.specs):
+        if task_id not in desired:
+            _apply_task(scheduler, state, task_id, None)
+    for task_id, spec in desired.items():
+        _apply_task(scheduler, state, task_id, spec)
+
+    state.watermark = watermark
+    state.last_full_sync = time.monotonic()
+
+
+def _sync_jobs(scheduler: BlockingScheduler, state: _SyncState) -> None:
+    """
+    Reconcile DB tasks -> APScheduler jobs so task edits take effect without restarts.
+
+    Only tasks logged in `task_changes` since the last tick are looked at; a full resync runs at
+    start-up and every SCHEDULER_FULL_RESYNC_SECONDS as a safety net (e.g. for raw SQL edits).
+    """
+    full_every = max(60, int(get_settings().scheduler_full_resync_seconds))
+    if state.watermark is None or time.monotonic() - state.last_full_sync >= full_every:
+        _full_sync(scheduler, state)
+        return
+
+    with db_session() as s:
+        changes = s.execute(
+            select(TaskChange.seq, TaskChange.task_id).where(TaskChange.seq > state.watermark).order_by(TaskChange.seq)
+        ).all()
+        if not changes:
+            return
+        task_ids = list({task_id for _, task_id in changes})
+        desired = _schedule_specs(s, task_ids)
+
+    for task_id in task_ids:
+        _apply_task(scheduler, state, task_id, desired.get(task_id))
+    state.watermark = changes[-1][0]
 
 
 def run_scheduler_loop() -> None:
     settings = get_settings()
-    scheduler = BlockingScheduler(timezone=ZoneInfo("UTC"))
+    if settings.scheduler_engine == "heap":
+        run_heap_scheduler()
+        return
+
+    global _BUFFER
+    window_ms = int(settings.scheduler_enqueue_window_ms)
+    _BUFFER = _EnqueueBuffer(window_seconds=window_ms / 1000) if window_ms > 0 else None
+
+    scheduler = BlockingScheduler(timezone=zone("UTC"))
 
     # Initial sync and periodic reconciliation.
-    _sync_jobs(scheduler)
+    state = _SyncState()
+    _sync_jobs(scheduler, state)
     scheduler.add_job(
         _sync_jobs,
         trigger="interval",
         seconds=max(5, int(settings.scheduler_interval)),
-        args=[scheduler],
+        args=[scheduler, state],
         id="_sync_jobs",
         max_instances=1,
         replace_existing=True,
     )
 
-    scheduler.start()
+    prefetch_lead = int(settings.web_search_prefetch_lead_seconds)
+    if prefetch_lead > 0:
+        scheduler.add_job(
+            prefetch_web_searches,
+            trigger="interval",
+            seconds=max(5, min(60, prefetch_lead // 2)),
+            id="_prefetch_web_searches",
+            max_instances=1,
+            replace_existing=True,
+        )
+
+    try:
+        scheduler.start()
+    finally:
+        if _BUFFER is not None:
+            _BUFFER.flush()
 
 
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+from app.database import ENGINE
+
+
+class WorkWaiter:
+    """
+    Lets an idle worker sleep until there may be new work.
+
+    Enqueuers (API `trigger_run`, scheduler) live in other processes and only share the SQLite
+    file, so we watch `PRAGMA data_version`: it changes whenever another connection commits.
+    Checking it is a read of the WAL index header, far cheaper than querying the runs table.
+    `notify()` wakes the waiter from inside the process (e.g. shutdown).
+    """
+
+    def __init__(self, *, check_interval: float) -> None:
+        self._check_interval = max(0.01, check_interval)
+        self._event = threading.Event()
+        self._conn: sqlite3.Connection | None = None
+        self._last_version: int | None = None
+
+        db_path = ENGINE.url.database
+        if ENGINE.url.get_backend_name() == "sqlite" and db_path and db_path != ":memory:":
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._last_version = self._data_version()
+
+    def _data_version(self) -> int | None:
+        if self._conn is None:
+            return None
+        try:
+            return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+        except sqlite3.Error:
+            return None
+
+    def _db_changed(self) -> bool:
+        version = self._data_version()
+        changed = version is not None and version != self._last_version
+        self._last_version = version
+        return changed
+
+    def notify(self) -> None:
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block for up to `timeout` seconds. Returns True if woken by a DB change or `notify()`.
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            if self._event.is_set():
+                self._event.clear()
+                return True
+            if self._db_changed():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Without a SQLite file to watch, only notify() or the timeout can wake us.
+            step = remaining if self._conn is None else min(remaining, self._check_interval)
+            self._event.wait(step)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
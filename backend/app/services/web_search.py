@@ -1,25 +1,79 @@
 from __future__ import annotations
 
+import threading
+
 import httpx
 
 from app.config import get_settings
 
 
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+
 class WebSearchError(RuntimeError):
     pass
 
 
-def tavily_search(*, query: str, max_results: int = 5) -> list[dict]:
+# Long-lived clients so keep-alive connections (and HTTP/2 streams) are reused across searches.
+_CLIENT: httpx.Client | None = None
+_ASYNC_CLIENT: httpx.AsyncClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _client_options() -> dict:
+    settings = get_settings()
+    return {
+        "http2": settings.web_search_http2,
+        "timeout": httpx.Timeout(settings.web_search_timeout, connect=settings.web_search_connect_timeout),
+        "limits": httpx.Limits(
+            max_connections=settings.web_search_max_connections,
+            max_keepalive_connections=settings.web_search_max_keepalive_connections,
+            keepalive_expiry=settings.web_search_keepalive_expiry,
+        ),
+    }
+
+
+def _get_client() -> httpx.Client:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT.is_closed:
+            _CLIENT = httpx.Client(**_client_options())
+        return _CLIENT
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # The async client is bound to the event loop it first runs on; use one loop per process.
+    global _ASYNC_CLIENT
+    with _CLIENT_LOCK:
+        if _ASYNC_CLIENT is None or _ASYNC_CLIENT.is_closed:
+            _ASYNC_CLIENT = httpx.AsyncClient(**_client_options())
+        return _ASYNC_CLIENT
+
+
+def close_clients() -> None:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is not None:
+            _CLIENT.close()
+            _CLIENT = None
+
+
+async def aclose_clients() -> None:
+    global _ASYNC_CLIENT
+    with _CLIENT_LOCK:
+        client, _ASYNC_CLIENT = _ASYNC_CLIENT, None
+    if client is not None:
+        await client.aclose()
+
+
+def _build_payload(*, query: str, max_results: int) -> dict:
     settings = get_settings()
     if not settings.tavily_api_key:
         raise WebSearchError("TAVILY_API_KEY not set")
+    return {"api_key": settings.tavily_api_key, "query": query, "max_results": max_results}
 
-    payload = {"api_key": settings.tavily_api_key, "query": query, "max_results": max_results}
-    with httpx.Client(timeout=20) as client:
-        r = client.post("https://api.tavily.com/search", json=payload)
-        r.raise_for_status()
-        data = r.json()
 
+def _normalize_results(data: dict, *, max_results: int) -> list[dict]:
     results = data.get("results") or []
     # Normalize to title/url/snippet
     out: list[dict] = []
@@ -34,3 +88,15 @@ def tavily_search(*, query: str, max_results: int = 5) -> list[dict]:
     return out
 
 
+def tavily_search(*, query: str, max_results: int = 5) -> list[dict]:
+    payload = _build_payload(query=query, max_results=max_results)
+    r = _get_client().post(TAVILY_SEARCH_URL, json=payload)
+    r.raise_for_status()
+    return _normalize_results(r.json(), max_results=max_results)
+
+
+async def atavily_search(*, query: str, max_results: int = 5) -> list[dict]:
+    payload = _build_payload(query=query, max_results=max_results)
+    r = await _get_async_client().post(TAVILY_SEARCH_URL, json=payload)
+    r.raise_for_status()
+    return _normalize_results(r.json(), max_results=max_results)
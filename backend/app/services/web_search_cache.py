@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, select
+
+from app.database import db_session
+from app.models import WebSearchSnapshot
+from app.models.base import utcnow
+from app.services import metrics
+from app.services.singleflight import SingleFlight
+from app.services.web_search import tavily_search
+
+
+# Tasks searching for the same query at the same moment share one Tavily request.
+_SEARCH_FLIGHTS = SingleFlight()
+
+
+def task_search_query(*, task_name: str, task_prompt: str) -> str:
+    # Simple heuristic: use task name as query; fall back to prompt prefix.
+    return (task_name or "").strip() or task_prompt.strip().splitlines()[0][:200]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())
+
+
+def search_cache_key(*, query: str, max_results: int) -> str:
+    return hashlib.sha256(f"{max_results}:{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+
+def _lookup(*, key: str, ttl_seconds: int) -> tuple[list[dict], datetime] | None:
+    # Snapshots double as the cache: any earlier run's results for the same key within the
+    # freshness window can be reused. `fetched_at` is the original Tavily fetch time, so copies
+    # never extend an entry's freshness.
+    cutoff = utcnow() - timedelta(seconds=ttl_seconds)
+    with db_session() as s:
+        row = s.execute(
+            select(WebSearchSnapshot.results, WebSearchSnapshot.fetched_at)
+            .where(WebSearchSnapshot.cache_key == key, WebSearchSnapshot.fetched_at >= cutoff)
+            .order_by(desc(WebSearchSnapshot.fetched_at))
+            .limit(1)
+        ).first()
+    if row is None:
+        return None
+    return row.results, row.fetched_at
+
+
+def cached_web_search(*, query: str, max_results: int, ttl_seconds: int) -> tuple[list[dict], datetime, bool]:
+    """
+    Returns: (results, fetched_at, served_from_cache)
+    """
+    key = search_cache_key(query=query, max_results=max_results)
+    if ttl_seconds > 0:
+        cached = _lookup(key=key, ttl_seconds=ttl_seconds)
+        if cached is not None:
+            metrics.incr("web_search_cache.hit")
+            results, fetched_at = cached
+            return results, fetched_at, True
+        metrics.incr("web_search_cache.miss")
+
+    fetched_at = utcnow()
+    results, shared = _SEARCH_FLIGHTS.do(key, lambda: tavily_search(query=query, max_results=max_results))
+    if shared:
+        metrics.incr("singleflight.web_search.shared")
+    return results, fetched_at, False
@@ -1,22 +1,55 @@
 from __future__ import annotations
 
-import time
-from datetime import datetime, timezone
-
-from sqlalchemy import desc, select, text
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import get_settings
 from app.database import db_session
-from app.models import Result, Run, Task, WebSearchSnapshot
-from app.prompts.templates import SYSTEM_PROMPT, build_user_prompt, wrap_web_results
-from app.services.llm import generate_structured_table, stringify_for_web_results
-from app.services.web_search import WebSearchError, tavily_search
+from app.models import LLMBatch, Result, Run, Task, WebSearchSnapshot
+from app.prompts.templates import SYSTEM_PROMPT, build_user_prompt
+from app.services import metrics
+from app.services.batch import (
+    PENDING_STATUSES,
+    batch_available,
+    batch_model,
+    build_request,
+    close_client as close_batch_client,
+    download_results,
+    get_batch,
+    parse_result_line,
+    submit_batch,
+)
+from app.services.llm import chat_messages, hedge_pool, parse_or_repair
+from app.services.llm_cache import cached_generate_structured_table
+from app.services.output_budget import output_token_budget
+from app.services.packing import generate_packed_tables, pack_groups
+from app.services.prefetch import claim_prefetched_snapshot
+from app.services.pricing import estimate_cost
+from app.services.prompt_assembly import WebResultsBlock, build_web_results_block
+from app.services.wakeup import WorkWaiter
+from app.services.web_search import WebSearchError, close_clients
+from app.services.web_search_cache import cached_web_search, search_cache_key, task_search_query
 from tenacity import RetryError
 
+logger = logging.getLogger(__name__)
+
+# Identifies this process in `Run.worker_id` so several worker replicas can share the runs table.
+WORKER_ID = get_settings().worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
+
 def _single_line(msg: str) -> str:
     # Keep API JSON valid + UI readable (no raw newlines/control chars).
     msg = (msg or "").replace("\r", " ").replace("\n", " ")
@@ -24,41 +57,99 @@ def _single_line(msg: str) -> str:
     return " ".join(msg.split())
 
 
-def _claim_next_run_id() -> str | None:
+def _claim_runs(*, limit: int, deferred: bool = False) -> list[str]:
     """
-    Single-worker MVP: claim the oldest queued run.
+    Atomically claim up to `limit` queued runs (oldest first) for this worker.
+    With a batch endpoint configured, runs of deferred tasks are only claimed with `deferred=True`
+    (by the batch submitter); otherwise every task runs immediately.
+
+    The claim itself is a single `UPDATE ... RETURNING` (SQLite 3.35+), so concurrent
+    workers can never take the same run. Each claimed run carries our worker id and a
+    lease that `_renew_leases` keeps extending; runs whose lease expired (worker died)
+    are put back in the queue here.
     """
+    if limit <= 0:
+        return []
+    now = _utcnow()
+    lease_until = now + timedelta(seconds=max(1, int(get_settings().worker_lease_seconds)))
+
     with db_session() as s:
-        run_id = s.execute(select(Run.id).where(Run.status == "queued").order_by(Run.scheduled_for).limit(1)).scalar()
-        if not run_id:
-            return None
+        s.execute(
+            update(Run)
+            .where(Run.status == "running", Run.lease_expires_at < now)
+            .values(status="queued", worker_id=None, lease_expires_at=None, started_at=None)
+            .execution_options(synchronize_session=False)
+        )
 
-        run = s.get(Run, run_id)
-        if not run or run.status != "queued":
-            return None
+        # Overlap protection: queued runs of a task that is already running are skipped.
+        running_tasks = select(Run.task_id).where(Run.status == "running")
+        s.execute(
+            update(Run)
+            .where(Run.status == "queued", Run.task_id.in_(running_tasks))
+            .values(status="failed", error_message="Skipped due to overlapping run", finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
 
-        # Overlap protection: if any run for this task is already running, skip this one.
-        already_running = (
-            s.execute(select(Run.id).where(Run.task_id == run.task_id).where(Run.status == "running").limit(1)).scalar()
-            is not None
+        # At most one run per task per batch (the oldest); the others hit overlap protection next time.
+        ranked = (
+            select(
+                Run.id,
+                Run.scheduled_for,
+                func.row_number().over(partition_by=Run.task_id, order_by=(Run.scheduled_for, Run.id)).label("rn"),
+            )
+            .where(Run.status == "queued")
         )
-        if already_running:
-            run.status = "failed"
-            run.error_message = "Skipped due to overlapping run"
-            run.finished_at = _utcnow()
-            s.add(run)
-            return None
+        if deferred:
+            ranked = ranked.join(Task, Task.id == Run.task_id).where(Task.execution_mode == "deferred")
+        elif batch_available():
+            ranked = ranked.join(Task, Task.id == Run.task_id).where(Task.execution_mode != "deferred")
+        ranked = ranked.subquery()
+        candidates = select(ranked.c.id).where(ranked.c.rn == 1).order_by(ranked.c.scheduled_for).limit(limit)
+        claimed = s.execute(
+            update(Run)
+            .where(Run.id.in_(candidates), Run.status == "queued")
+            .values(status="running", started_at=now, worker_id=WORKER_ID, lease_expires_at=lease_until)
+            .returning(Run.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(claimed.scalars().all())
 
-        run.status = "running"
-        run.started_at = _utcnow()
-        s.add(run)
-        return run_id
+
+def _renew_leases() -> None:
+    lease_until = _utcnow() + timedelta(seconds=max(1, int(get_settings().worker_lease_seconds)))
+    with db_session() as s:
+        s.execute(
+            update(Run)
+            .where(Run.worker_id == WORKER_ID, Run.status == "running")
+            .values(lease_expires_at=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _heartbeat_loop(stop: threading.Event) -> None:
+    interval = max(1, int(get_settings().worker_lease_seconds) // 3)
+    while not stop.wait(interval):
+        try:
+            _renew_leases()
+        except Exception:
+            # A missed heartbeat is fine as long as the next one lands before the lease expires.
+            continue
+
+
+def _first_not_none(*values):  # type: ignore[no-untyped-def]
+    # Per-task overrides fall back to global settings only when unset (0 is a valid override).
+    return next((v for v in values if v is not None), None)
+
+
+def _owned_by_other_worker(run: Run) -> bool:
+    # Our lease expired and another worker reclaimed the run; its outcome is theirs to record.
+    return bool(run.worker_id) and run.worker_id != WORKER_ID
 
 
 def _finish_failed(*, run_id: str, error: str) -> None:
     with db_session() as s:
         run = s.get(Run, run_id)
-        if not run:
+        if not run or _owned_by_other_worker(run):
             return
         run.status = "failed"
         # Never leak secrets in error messages (LLM client libs sometimes echo auth headers / keys).
@@ -68,18 +159,23 @@ def _finish_failed(*, run_id: str, error: str) -> None:
                 msg = msg.replace(secret, "***REDACTED***")
         run.error_message = msg
         run.finished_at = _utcnow()
+        run.lease_expires_at = None
         s.add(run)
 
 
-def _finish_success(*, run_id: str, result_columns: list[dict], result_rows: list[dict], summary: str | None, llm_model: str | None, token_usage: dict | None) -> None:
+def _finish_success(*, run_id: str, result_columns: list[dict], result_rows: list[dict], summary: str | None, llm_model: str | None, token_usage: dict | None, llm_cache_hit: bool = False, stats: dict | None = None, batch: bool = False) -> None:
     with db_session() as s:
         run = s.get(Run, run_id)
-        if not run:
+        if not run or _owned_by_other_worker(run):
             return
         run.status = "success"
         run.finished_at = _utcnow()
+        run.lease_expires_at = None
         run.llm_model = llm_model
         run.token_usage = token_usage
+        run.llm_cache_hit = llm_cache_hit
+        run.stats = stats or None
+        run.cost_estimate = 0.0 if llm_cache_hit else estimate_cost(llm_model=llm_model, token_usage=token_usage, batch=batch)
         s.add(run)
 
         s.add(
@@ -96,59 +192,117 @@ def _finish_success(*, run_id: str, result_columns: list[dict], result_rows: lis
 def _maybe_do_web_search(
     *,
     run_id: str,
+    task_id: str,
+    scheduled_for: datetime,
     task_name: str,
     task_prompt: str,
     web_search_enabled: bool,
-) -> str | None:
+    cache_ttl_seconds: int = 0,
+) -> WebResultsBlock | None:
     if not web_search_enabled:
         return None
+    query = task_search_query(task_name=task_name, task_prompt=task_prompt)
+
+    # A run reclaimed after an expired lease reuses the snapshot from its first attempt.
+    with db_session() as s:
+        existing = s.execute(select(WebSearchSnapshot.results).where(WebSearchSnapshot.run_id == run_id)).scalar()
+    if existing is not None:
+        return _web_results_block(existing, query=query)
+
+    # The scheduler may already have fetched results ahead of the fire time.
+    prefetched = claim_prefetched_snapshot(task_id=task_id, run_id=run_id, scheduled_for=scheduled_for)
+    if prefetched is not None:
+        return _web_results_block(prefetched, query=query)
 
-    # Simple heuristic: use task name as query; fall back to prompt prefix.
-    query = (task_name or "").strip() or task_prompt.strip().splitlines()[0][:200]
     try:
-        results = tavily_search(query=query, max_results=5)
+        results, fetched_at, from_cache = cached_web_search(query=query, max_results=5, ttl_seconds=cache_ttl_seconds)
     except WebSearchError:
         return None
     except Exception:
         return None
 
+    # Cached results are still snapshotted per run so every run stays reproducible.
     with db_session() as s:
-        s.add(WebSearchSnapshot(run_id=run_id, query=query, results=results))
+        s.add(
+            WebSearchSnapshot(
+                run_id=run_id,
+                task_id=task_id,
+                query=query,
+                results=results,
+                cache_key=search_cache_key(query=query, max_results=5),
+                fetched_at=fetched_at,
+                from_cache=from_cache,
+            )
+        )
+
+    return _web_results_block(results, query=query)
+
 
-    return wrap_web_results(stringify_for_web_results(results))
+def _web_results_block(results: list[dict], *, query: str) -> WebResultsBlock | None:
+    settings = get_settings()
+    return build_web_results_block(
+        results,
+        token_budget=int(settings.web_results_token_budget),
+        max_snippet_tokens=int(settings.web_results_max_snippet_tokens),
+        query=query,
+    )
+
+
+def _load_task_data(run_id: str) -> dict | None:
+    # Load immutable task data (avoid passing ORM objects across sessions).
+    with db_session() as s:
+        run = s.get(Run, run_id)
+        if not run:
+            return None
+        task = s.get(Task, run.task_id)
+        if not task:
+            _finish_failed(run_id=run_id, error="Task not found")
+            return None
+        return {
+            "id": task.id,
+            "scheduled_for": run.scheduled_for,
+            "name": task.name,
+            "prompt": task.prompt,
+            "web_search_enabled": task.web_search_enabled,
+            "llm_cache_ttl_seconds": task.llm_cache_ttl_seconds,
+            "web_search_cache_ttl_seconds": task.web_search_cache_ttl_seconds,
+            "llm_hedge_after_seconds": task.llm_hedge_after_seconds,
+            "max_output_tokens": task.max_output_tokens,
+        }
+
+
+def _build_prompt(run_id: str, task_data: dict) -> tuple[str, WebResultsBlock | None]:
+    web_block = _maybe_do_web_search(
+        run_id=run_id,
+        task_id=task_data["id"],
+        scheduled_for=task_data["scheduled_for"],
+        task_name=task_data["name"],
+        task_prompt=task_data["prompt"],
+        web_search_enabled=bool(task_data["web_search_enabled"]),
+        cache_ttl_seconds=int(_first_not_none(task_data["web_search_cache_ttl_seconds"], get_settings().web_search_cache_ttl_seconds)),
+    )
+    user_prompt = build_user_prompt(
+        user_prompt=task_data["prompt"],
+        web_results_block=web_block.text if web_block else None,
+    )
+    return user_prompt, web_block
 
 
 def _execute_run(run_id: str) -> None:
     try:
-        # Load immutable task data (avoid passing ORM objects across sessions).
-        with db_session() as s:
-            run = s.get(Run, run_id)
-            if not run:
-                return
-            task = s.get(Task, run.task_id)
-            if not task:
-                _finish_failed(run_id=run_id, error="Task not found")
-                return
-            task_data = {
-                "id": task.id,
-                "name": task.name,
-                "prompt": task.prompt,
-                "web_search_enabled": task.web_search_enabled,
-            }
-
-        web_block = _maybe_do_web_search(
-            run_id=run_id,
-            task_name=task_data["name"],
-            task_prompt=task_data["prompt"],
-            web_search_enabled=bool(task_data["web_search_enabled"]),
-        )
-        user_prompt = build_user_prompt(user_prompt=task_data["prompt"], web_results_block=web_block)
+        task_data = _load_task_data(run_id)
+        if task_data is None:
+            return
+        user_prompt, web_block = _build_prompt(run_id, task_data)
 
         try:
-            table, token_usage, llm_model = generate_structured_table(
+            llm_result = cached_generate_structured_table(
                 system_prompt=SYSTEM_PROMPT,
                 user_prompt=user_prompt,
                 task_name=task_data["name"],
+                ttl_seconds=int(_first_not_none(task_data["llm_cache_ttl_seconds"], get_settings().llm_cache_ttl_seconds)),
+                hedge_after_seconds=task_data["llm_hedge_after_seconds"],
+                max_output_tokens=output_token_budget(task_id=task_data["id"], override=task_data["max_output_tokens"]),
             )
         except RetryError as e:
             # tenacity wraps the underlying exception; expose it for debugging.
@@ -162,38 +316,394 @@ def _execute_run(run_id: str) -> None:
             msg = str(underlying or e)
             raise RuntimeError(f"LLM failed: {msg}") from underlying or e
 
+        table = llm_result.table
         cols = [c.model_dump() if hasattr(c, "model_dump") else dict(c) for c in table.columns]  # type: ignore[arg-type]
-        rows = list(table.rows)
+        rows = table.rows
         _finish_success(
             run_id=run_id,
             result_columns=cols,
             result_rows=rows,
             summary=table.summary,
-            llm_model=llm_model,
-            token_usage=token_usage,
+            llm_model=llm_result.llm_model,
+            token_usage=llm_result.token_usage,
+            llm_cache_hit=llm_result.cache_hit,
+            stats=_run_stats(llm_result.timings, web_block=web_block),
         )
     except Exception as e:
         _finish_failed(run_id=run_id, error=f"Worker crashed: {e}")
 
 
-def run_worker_loop() -> None:
+def _execute_packed(run_ids: list[str]) -> None:
     """
-    MVP worker stub.
+    Answer compatible runs (see `pack_groups`) with one LLM call. Runs whose sub-result is missing or
+    invalid, or all of them if the packed call fails, go back to the queue as single runs, so each
+    gets its own slot (here or on another worker) instead of running one after another in this one.
+    """
+    task_data = {}
+    for run_id in run_ids:
+        data = _load_task_data(run_id)
+        if data is not None:
+            task_data[run_id] = data
+    if not task_data:
+        return
+
+    try:
+        budget = sum(output_token_budget(task_id=d["id"], override=d["max_output_tokens"]) for d in task_data.values())
+        packed = generate_packed_tables(
+            system_prompt=SYSTEM_PROMPT,
+            prompts={run_id: d["prompt"] for run_id, d in task_data.items()},
+            task_names={run_id: d["name"] for run_id, d in task_data.items()},
+            max_output_tokens=min(budget, int(get_settings().llm_output_budget_max)),
+        )
+    except Exception:
+        metrics.incr("llm_packing.failed")
+        _release_runs(list(task_data), packable=False)
+        return
+
+    unpacked = [run_id for run_id in task_data if packed.tables.get(run_id) is None]
+    if unpacked:
+        metrics.incr("llm_packing.fallback", len(unpacked))
+        _release_runs(unpacked, packable=False)
+    for run_id in task_data:
+        table = packed.tables.get(run_id)
+        if table is None:
+            continue
+        try:
+            _finish_success(
+                run_id=run_id,
+                result_columns=[c.model_dump() for c in table.columns],
+                result_rows=table.rows,
+                summary=table.summary,
+                llm_model=packed.llm_model,
+                token_usage=packed.token_usage.get(run_id),
+                stats={**packed.timings, "packed": len(task_data)},
+            )
+        except Exception as e:
+            _finish_failed(run_id=run_id, error=f"Worker crashed: {e}")
+
+
+def _release_runs(run_ids: list[str], *, packable: bool = True) -> None:
+    """
+    Hand claimed but unstarted runs back to the queue for any worker. `packable=False` marks them
+    so `pack_groups` keeps them out of packs from then on.
+    """
+    if not run_ids:
+        return
+    values: dict = {"status": "queued", "worker_id": None, "lease_expires_at": None, "started_at": None}
+    if not packable:
+        values["stats"] = {"packable": False}
+    with db_session() as s:
+        s.execute(
+            update(Run)
+            .where(Run.id.in_(run_ids), Run.status == "running", Run.worker_id == WORKER_ID)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
 
-    Real implementation will:
-    - claim queued runs atomically
-    - execute web search (optional)
-    - call LLM via Instructor
-    - persist results
+def _submit_units(pool: ThreadPoolExecutor, run_ids: list[str], *, packing: bool, free: int) -> set[Future]:
     """
+    Submit at most `free` units (a single run or a pack). With packing more runs are claimed than
+    there are free slots, so that packs can fill up; runs that end up outside the submitted units
+    are released right away instead of waiting in the pool queue while other workers idle.
+    """
+    if not packing:
+        groups = [[run_id] for run_id in run_ids]
+    else:
+        try:
+            groups = pack_groups(run_ids)
+        except Exception:
+            groups = [[run_id] for run_id in run_ids]
+        # Oldest claimed run first, so released runs are not always the same kind.
+        order = {run_id: i for i, run_id in enumerate(run_ids)}
+        groups.sort(key=lambda group: min(order[run_id] for run_id in group))
+
+    _release_runs([run_id for group in groups[free:] for run_id in group])
+    return {
+        pool.submit(_execute_run, group[0]) if len(group) == 1 else pool.submit(_execute_packed, group)
+        for group in groups[:free]
+    }
+
+
+def _run_stats(timings: dict, *, web_block: WebResultsBlock | None) -> dict:
+    stats = dict(timings)
+    if web_block is not None:
+        stats["web_results_tokens"] = web_block.tokens
+        stats["web_results_tokens_saved"] = web_block.tokens_saved
+        stats["web_results_dropped"] = web_block.results_dropped
+    return stats
+
+
+def _prepare_batch_request(run_id: str, *, model: str) -> tuple[dict, dict] | None:
+    """
+    Returns: (batch request line, initial run stats), or None if the run was finished here.
+    """
+    task_data = _load_task_data(run_id)
+    if task_data is None:
+        return None
+    user_prompt, web_block = _build_prompt(run_id, task_data)
+    request = build_request(
+        custom_id=run_id,
+        model=model,
+        messages=chat_messages(system_prompt=SYSTEM_PROMPT, user_prompt=user_prompt),
+        max_tokens=output_token_budget(task_id=task_data["id"], override=task_data["max_output_tokens"]),
+    )
+    return request, _run_stats({"deferred": True}, web_block=web_block)
+
+
+def _submit_deferred_runs() -> None:
+    """
+    Collect queued runs of deferred tasks into one provider batch job, once LLM_BATCH_MIN_SIZE of
+    them are waiting or the oldest has waited LLM_BATCH_MAX_WAIT_SECONDS.
+    """
+    if not batch_available():
+        return
     settings = get_settings()
-    poll = max(1, int(settings.worker_poll_interval))
+    now = _utcnow()
+    overdue_before = now - timedelta(seconds=max(0, int(settings.llm_batch_max_wait_seconds)))
+    with db_session() as s:
+        waiting, overdue = s.execute(
+            select(
+                func.count(Run.id),
+                func.coalesce(func.sum(case((Run.scheduled_for <= overdue_before, 1), else_=0)), 0),
+            )
+            .join(Task, Task.id == Run.task_id)
+            .where(Run.status == "queued", Task.execution_mode == "deferred")
+        ).one()
+    if not waiting or (waiting < max(1, int(settings.llm_batch_min_size)) and not overdue):
+        return
 
-    while True:
-        run_id = _claim_next_run_id()
-        if run_id:
-            _execute_run(run_id)
+    model = batch_model()
+    try:
+        run_ids = _claim_runs(limit=max(1, int(settings.llm_batch_max_size)), deferred=True)
+    except SQLAlchemyError as e:
+        # E.g. the DB stayed locked past the busy timeout; the next batch loop pass retries.
+        logger.warning("Claiming deferred runs failed: %s", e)
+        return
+    prepared: dict[str, tuple[dict, dict]] = {}
+    for run_id in run_ids:
+        try:
+            request = _prepare_batch_request(run_id, model=model)
+        except Exception as e:
+            _finish_failed(run_id=run_id, error=f"Worker crashed: {e}")
+            continue
+        if request is not None:
+            prepared[run_id] = request
+    if not prepared:
+        return
 
-        time.sleep(poll)
+    try:
+        job = submit_batch([request for request, _ in prepared.values()])
+    except Exception:
+        # Back to the queue; the next pass retries (web search snapshots are reused).
+        with db_session() as s:
+            s.execute(
+                update(Run)
+                .where(Run.id.in_(list(prepared)), Run.worker_id == WORKER_ID, Run.status == "running")
+                .values(status="queued", worker_id=None, lease_expires_at=None, started_at=None)
+                .execution_options(synchronize_session=False)
+            )
+        metrics.incr("llm_batch.submit_failed")
+        return
+
+    with db_session() as s:
+        s.add(
+            LLMBatch(
+                id=job["id"],
+                status=job.get("status") or "validating",
+                model=model,
+                input_file_id=job.get("input_file_id") or "",
+                request_count=len(prepared),
+                next_poll_at=now + timedelta(seconds=max(1, int(settings.llm_batch_poll_interval))),
+            )
+        )
+        s.flush()
+        for run_id, (_, stats) in prepared.items():
+            # Waiting on the provider, not on us: no lease, so no worker re-queues these runs.
+            s.execute(
+                update(Run)
+                .where(Run.id == run_id, Run.worker_id == WORKER_ID)
+                .values(batch_id=job["id"], worker_id=None, lease_expires_at=None, stats=stats)
+                .execution_options(synchronize_session=False)
+            )
+    metrics.incr("llm_batch.submitted")
+    metrics.incr("llm_batch.runs", len(prepared))
 
 
+def _finish_batch_line(line: dict, *, batch_id: str, model: str) -> None:
+    run_id, content, usage, error = parse_result_line(line)
+    with db_session() as s:
+        run = s.get(Run, run_id)
+        if not run or run.batch_id != batch_id or run.status != "running":
+            return
+        stats = dict(run.stats or {})
+
+    if error:
+        _finish_failed(run_id=run_id, error=f"Batch request failed: {error}")
+        return
+    try:
+        table = parse_or_repair(content or "", timings=stats)
+    except Exception as e:
+        _finish_failed(run_id=run_id, error=str(e))
+        return
+    _finish_success(
+        run_id=run_id,
+        result_columns=[c.model_dump() for c in table.columns],
+        result_rows=table.rows,
+        summary=table.summary,
+        llm_model=f"batch:{model}",
+        token_usage=usage,
+        stats=stats,
+        batch=True,
+    )
+
+
+def _poll_batch(batch_id: str) -> None:
+    with db_session() as s:
+        row = s.get(LLMBatch, batch_id)
+        if row is None:
+            return
+        model = row.model
+
+    job = get_batch(batch_id)
+    status = str(job.get("status") or "")
+    if status in PENDING_STATUSES:
+        with db_session() as s:
+            s.execute(update(LLMBatch).where(LLMBatch.id == batch_id).values(status=status))
+        return
+
+    for file_id in (job.get("output_file_id"), job.get("error_file_id")):
+        if file_id:
+            for line in download_results(file_id):
+                _finish_batch_line(line, batch_id=batch_id, model=model)
+
+    error = None if status == "completed" else f"Batch {status or 'lost'}: {job.get('errors') or ''}".strip()
+    # Whatever did not come back in the output/error files fails (a later schedule runs again).
+    with db_session() as s:
+        leftover = s.execute(select(Run.id).where(Run.batch_id == batch_id, Run.status == "running")).scalars().all()
+    for run_id in leftover:
+        _finish_failed(run_id=run_id, error=error or "Missing from batch output")
+
+    with db_session() as s:
+        s.execute(
+            update(LLMBatch)
+            .where(LLMBatch.id == batch_id)
+            .values(
+                status=status or "failed",
+                output_file_id=job.get("output_file_id"),
+                error_file_id=job.get("error_file_id"),
+                error_message=_single_line(error) if error else None,
+                completed_at=_utcnow(),
+            )
+        )
+    metrics.incr(f"llm_batch.{status or 'failed'}")
+
+
+def _poll_batches() -> None:
+    now = _utcnow()
+    interval = timedelta(seconds=max(1, int(get_settings().llm_batch_poll_interval)))
+    # Pushing next_poll_at forward is the claim: concurrent workers never poll the same batch.
+    with db_session() as s:
+        due = s.execute(
+            update(LLMBatch)
+            .where(LLMBatch.status.in_(PENDING_STATUSES), LLMBatch.next_poll_at <= now)
+            .values(next_poll_at=now + interval)
+            .returning(LLMBatch.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+    for batch_id in due:
+        try:
+            _poll_batch(batch_id)
+        except Exception:
+            # Polled again next interval.
+            continue
+
+
+def _batch_loop(stop: threading.Event) -> None:
+    interval = max(1, int(get_settings().worker_poll_interval))
+    while not stop.wait(interval):
+        for step in (_submit_deferred_runs, _poll_batches):
+            try:
+                step()
+            except Exception:
+                continue
+
+
+def _install_stop_handlers(stop: threading.Event, waiter: WorkWaiter) -> None:
+    """
+    SIGTERM/SIGINT stop claiming new runs; in-flight runs are allowed to finish.
+    """
+
+    def _handler(_signum, _frame):  # type: ignore[no-untyped-def]
+        stop.set()
+        waiter.notify()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, _handler)
+
+
+def run_worker_loop(*, concurrency: int | None = None) -> None:
+    """
+    Claim queued runs and execute up to `concurrency` of them in parallel.
+
+    Runs are mostly waiting on network I/O (web search + LLM), so a thread pool is enough.
+    A new run is claimed as soon as a slot frees up. When the queue is empty the loop sleeps
+    until another process commits to the DB (see `WorkWaiter`), re-checking the queue with an
+    exponential backoff capped at `worker_poll_interval`.
+    """
+    settings = get_settings()
+    poll = max(1, int(settings.worker_poll_interval))
+    min_idle = min(float(poll), max(0.01, float(settings.worker_idle_backoff_min)))
+    idle = min_idle
+    slots = max(1, int(concurrency or settings.worker_concurrency))
+    batch = max(1, int(settings.worker_claim_batch))
+    packing = bool(settings.worker_packing_enabled)
+    # With packing, one slot can take a whole pack, so claim more than the free slots (the runs
+    # that do not fit are released again, see _submit_units).
+    per_slot = max(1, int(settings.worker_packing_max_runs)) if packing else 1
+    # Size the hedge pool for this loop's slots (which may override WORKER_CONCURRENCY).
+    hedge_pool(slots=slots)
+
+    stop = threading.Event()
+    waiter = WorkWaiter(check_interval=float(settings.worker_wakeup_check_interval))
+    _install_stop_handlers(stop, waiter)
+    heartbeat_stop = threading.Event()
+    threading.Thread(target=_heartbeat_loop, args=(heartbeat_stop,), name="lease-heartbeat", daemon=True).start()
+    if batch_available():
+        threading.Thread(target=_batch_loop, args=(heartbeat_stop,), name="llm-batch", daemon=True).start()
+
+    in_flight: set[Future] = set()
+    with ThreadPoolExecutor(max_workers=slots, thread_name_prefix="run") as pool:
+        while not stop.is_set():
+            in_flight = {f for f in in_flight if not f.done()}
+
+            queue_empty = False
+            while len(in_flight) < slots and not stop.is_set():
+                free = slots - len(in_flight)
+                try:
+                    run_ids = _claim_runs(limit=min(batch, free * per_slot))
+                except SQLAlchemyError as e:
+                    # E.g. the DB stayed locked past the busy timeout: retry after the idle backoff.
+                    logger.warning("Claiming runs failed, retrying in %.2fs: %s", idle, e)
+                    run_ids = []
+                if not run_ids:
+                    queue_empty = True
+                    break
+                in_flight.update(_submit_units(pool, run_ids, packing=packing, free=free))
+
+            if queue_empty:
+                if waiter.wait(idle):
+                    idle = min_idle
+                else:
+                    idle = min(float(poll), idle * 2)
+            elif in_flight:
+                idle = min_idle
+                # All slots busy: wake up as soon as one run finishes.
+                wait(in_flight, timeout=poll, return_when=FIRST_COMPLETED)
+
+        # Leaving the `with` block waits for in-flight runs to finish (their leases keep being renewed).
+
+    heartbeat_stop.set()
+    waiter.close()
+    close_clients()
+    close_batch_client()
@@ -1,23 +1,175 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections.abc import Iterable
 from datetime import datetime, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 
 from croniter import croniter
 
+# Distinct (expression, timezone) pairs kept compiled; tasks mostly share a handful of schedules.
+_CACHE_SIZE = 1024
+_UTC = ZoneInfo("UTC")
+# Minimum spacing between two runs of a task, enforced for cron expressions and kept by jitter.
+MIN_CRON_INTERVAL_MINUTES = 15
+
+
+class CompiledCron:
+    """
+    A parsed cron expression bound to its timezone. The croniter is re-positioned for each call
+    instead of re-parsing the expression; the lock makes that safe across scheduler threads.
+    """
+
+    def __init__(self, cron_expression: str, tz: ZoneInfo) -> None:
+        self.tz = tz
+        self._itr = croniter(cron_expression, datetime.now(tz))
+        self._lock = threading.Lock()
+
+    def next_times(self, base_time_utc: datetime, count: int = 1) -> list[datetime]:
+        """
+        Returns: the next `count` fire times strictly after `base_time_utc`, in UTC.
+        """
+        base_local = base_time_utc.astimezone(self.tz)
+        with self._lock:
+            self._itr.set_current(base_local, force=True)
+            times = [self._itr.get_next(datetime) for _ in range(count)]
+        # Persist in UTC: SQLite stores datetimes as offset-less strings, so a single reference
+        # timezone keeps next_run_at comparable with "now" and across tasks.
+        return [t.astimezone(_UTC) for t in times]
+
+    def prev_time(self, base_time_utc: datetime) -> datetime:
+        """
+        Returns: the latest fire time at or before `base_time_utc`, in UTC.
+        """
+        # croniter's get_prev is strict; cron fields have minute resolution, so +1s makes it inclusive.
+        base_local = (base_time_utc + timedelta(seconds=1)).astimezone(self.tz)
+        with self._lock:
+            self._itr.set_current(base_local, force=True)
+            prev = self._itr.get_prev(datetime)
+        return prev.astimezone(_UTC)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def compiled_cron(cron_expression: str, timezone: str) -> CompiledCron:
+    """
+    Raises: ValueError / KeyError for invalid expressions or timezones (not cached).
+    """
+    return CompiledCron(cron_expression, zone(timezone))
+
+
+def jitter_offset(*, task_id: str, fire_time_utc: datetime, max_seconds: float, mode: str) -> timedelta:
+    """
+    Offset in [0, max_seconds) for one firing of a task. "hash": the same offset for every firing,
+    spreading tasks that share a schedule evenly; "random": a new offset per firing, still derived
+    from (task id, fire time) so the scheduler and Task.next_run_at agree without stored state.
+    """
+    key = task_id if mode == "hash" else f"{task_id}:{fire_time_utc.isoformat()}"
+    fraction = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big") / 2**64
+    return timedelta(seconds=max(0.0, max_seconds) * fraction)
+
+
+def fire_points(compiled: CompiledCron, base_time_utc: datetime) -> tuple[datetime, datetime, datetime]:
+    """
+    Returns: (latest fire time at or before, next, the one after) around `base_time_utc`, in UTC;
+    everything `jittered_next` needs, so tasks sharing a schedule can compute it once.
+    """
+    first, second = compiled.next_times(base_time_utc, 2)
+    return compiled.prev_time(base_time_utc), first, second
+
+
+def jittered_next(
+    points: tuple[datetime, datetime, datetime], *, base_time_utc: datetime, task_id: str, jitter_seconds: int, mode: str
+) -> datetime:
+    """
+    Next shifted fire time after `base_time_utc`, from that base's `fire_points`.
+    """
+    def shifted(fire: datetime, following: datetime) -> datetime:
+        # Capped at half the gap to the next firing, so a shifted run never reaches the next one,
+        # and at the gap minus the minimum interval, so consecutive runs (whatever the next offset)
+        # stay at least MIN_CRON_INTERVAL_MINUTES apart. A */15 schedule therefore gets no jitter.
+        gap = (following - fire).total_seconds()
+        cap = min(float(jitter_seconds), gap / 2, gap - MIN_CRON_INTERVAL_MINUTES * 60)
+        return fire + jitter_offset(task_id=task_id, fire_time_utc=fire, max_seconds=cap, mode=mode)
+
+    prev, first, second = points
+    # The previous firing's shifted time may still lie ahead of `base_time_utc`.
+    candidate = shifted(prev, first)
+    if candidate > base_time_utc:
+        return candidate
+    return shifted(first, second)
+
+
+def next_run_times(
+    *,
+    cron_expression: str,
+    timezone: str,
+    base_time_utc: datetime,
+    count: int,
+    task_id: str | None = None,
+    jitter_seconds: int = 0,
+    jitter_mode: str = "hash",
+) -> list[datetime]:
+    """
+    Next `count` fire times after `base_time_utc`, in UTC, shifted by the task's jitter if any.
+    """
+    compiled = compiled_cron(cron_expression, timezone)
+    if task_id is None or jitter_seconds <= 0:
+        return compiled.next_times(base_time_utc, count)
+    times: list[datetime] = []
+    base = base_time_utc
+    for _ in range(count):
+        base = jittered_next(
+            fire_points(compiled, base), base_time_utc=base, task_id=task_id, jitter_seconds=jitter_seconds, mode=jitter_mode
+        )
+        times.append(base)
+    return times
+
+
+def bulk_fire_points(
+    specs: Iterable[tuple[str, str]],
+    *,
+    base_time_utc: datetime,
+) -> dict[tuple[str, str], tuple[datetime, datetime, datetime] | None]:
+    """
+    `fire_points` for many (cron_expression, timezone) pairs, each distinct pair computed once.
+    Invalid pairs map to None.
+    """
+    out: dict[tuple[str, str], tuple[datetime, datetime, datetime] | None] = {}
+    for spec in specs:
+        if spec in out:
+            continue
+        try:
+            out[spec] = fire_points(compiled_cron(*spec), base_time_utc)
+        except Exception:
+            out[spec] = None
+    return out
+
 
 def compute_next_run_at(
     *,
     cron_expression: str,
     timezone: str,
     base_time_utc: datetime,
+    task_id: str | None = None,
+    jitter_seconds: int = 0,
+    jitter_mode: str = "hash",
 ) -> datetime:
-    tz = ZoneInfo(timezone)
-    base_local = base_time_utc.astimezone(tz)
-    itr = croniter(cron_expression, base_local)
-    next_local = itr.get_next(datetime)
-    # Persist timezone-aware datetime; in SQLite this will store as string, SQLAlchemy will parse.
-    return next_local.astimezone(tz)
+    return next_run_times(
+        cron_expression=cron_expression,
+        timezone=timezone,
+        base_time_utc=base_time_utc,
+        count=1,
+        task_id=task_id,
+        jitter_seconds=jitter_seconds,
+        jitter_mode=jitter_mode,
+    )[0]
 
 
 def ensure_min_cron_interval_minutes(
@@ -25,14 +177,10 @@ def ensure_min_cron_interval_minutes(
     cron_expression: str,
     timezone: str,
     base_time_utc: datetime,
-    min_minutes: int = 15,
+    min_minutes: int = MIN_CRON_INTERVAL_MINUTES,
 ) -> None:
-    tz = ZoneInfo(timezone)
-    base_local = base_time_utc.astimezone(tz)
-    itr = croniter(cron_expression, base_local)
-    first = itr.get_next(datetime)
-    second = itr.get_next(datetime)
+    first, second = next_run_times(
+        cron_expression=cron_expression, timezone=timezone, base_time_utc=base_time_utc, count=2
+    )
     if (second - first) < timedelta(minutes=min_minutes):
         raise ValueError(f"Cron interval must be >= {min_minutes} minutes")
-
-
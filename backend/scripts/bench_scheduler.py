@@ -0,0 +1,179 @@
+"""
+Scheduler benchmark: APScheduler (one job per task) vs. the DB-driven heap engine (SCHEDULER_ENGINE=heap).
+
+For each task count, in a fresh SQLite DB:
+  - load: initial sync into APScheduler / initial heap load (time, traced Python memory)
+  - tick: one reconciliation tick with nothing changed
+  - fire: every task due at once. APScheduler per-task `_enqueue_run` (measured on a sample and
+    extrapolated), APScheduler firings coalesced by the enqueue buffer (SCHEDULER_ENQUEUE_WINDOW_MS),
+    and one `fire_due` transaction for the heap; the heap again with every task jittered
+    (jitter_seconds=JITTER_SECONDS), which adds a per-task next_run_at
+
+    cd backend && python scripts/bench_scheduler.py --tasks 1000 5000 10000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+APS_FIRE_SAMPLE = 1000
+JITTER_SECONDS = 600
+
+
+def _measure(fn, *, memory: bool = True):  # type: ignore[no-untyped-def]
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def _reset(now: datetime, *, jitter_seconds: int | None = None) -> None:
+    from app.database import db_session
+    from app.models import Run, Task
+
+    with db_session() as s:
+        s.execute(Run.__table__.delete())
+        s.execute(Task.__table__.update().values(next_run_at=now - timedelta(seconds=5), jitter_seconds=jitter_seconds))
+
+
+def _burst(aps, task_ids: list[str]) -> int:  # type: ignore[no-untyped-def]
+    # What the APScheduler thread pool does at :00, then the window timer's flush.
+    for task_id in task_ids:
+        aps._enqueue_run(task_id)
+    return aps._BUFFER.flush()
+
+
+def _seed(n: int, *, next_run_at: datetime) -> list[str]:
+    from sqlalchemy import insert
+
+    from app.database import ENGINE, db_session
+    from app.models import Base, Task
+
+    Base.metadata.create_all(bind=ENGINE)
+    now = datetime.now(timezone.utc)
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    rows = [
+        {
+            "id": task_id,
+            "name": f"task {i}",
+            "prompt": "bench",
+            "cron_expression": "0 * * * *" if i % 2 else "30 * * * *",
+            "timezone": "UTC",
+            "web_search_enabled": False,
+            "status": "enabled",
+            "execution_mode": "immediate",
+            "next_run_at": next_run_at,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i, task_id in enumerate(ids)
+    ]
+    with db_session() as s:
+        for i in range(0, n, 5000):
+            s.execute(insert(Task), rows[i : i + 5000])
+    return ids
+
+
+def _bench_one(n: int) -> dict:
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from sqlalchemy import func, select
+
+    from app.database import db_session
+    from app.models import Run
+    from app.services import scheduler as aps
+    from app.services.heap_scheduler import HeapScheduler
+
+    now = datetime.now(timezone.utc)
+    ids = _seed(n, next_run_at=now - timedelta(seconds=5))
+    out: dict = {"tasks": n}
+
+    sched = BackgroundScheduler(timezone="UTC")
+    sched.start(paused=True)
+    state = aps._SyncState()
+    _, out["aps_load_s"], out["aps_load_mb"] = _measure(lambda: aps._sync_jobs(sched, state))
+    _, out["aps_tick_s"], _ = _measure(lambda: aps._sync_jobs(sched, state))
+    sample = ids[:APS_FIRE_SAMPLE]
+    _, elapsed, _ = _measure(lambda: [aps._enqueue_run(task_id) for task_id in sample], memory=False)
+    out["aps_fire_s"] = elapsed / len(sample) * n
+    sched.shutdown(wait=False)
+
+    _reset(now)
+    aps._BUFFER = aps._EnqueueBuffer(window_seconds=60)
+    out["aps_batched_runs"], out["aps_batched_fire_s"], _ = _measure(lambda: _burst(aps, ids), memory=False)
+    aps._BUFFER = None
+
+    _reset(now)
+
+    heap = HeapScheduler(horizon_seconds=3600, misfire_grace_seconds=60)
+    _, out["heap_load_s"], out["heap_load_mb"] = _measure(lambda: heap.full_load(now))
+    _, out["heap_tick_s"], _ = _measure(lambda: heap.refresh(now, full_every=3600))
+    fired, out["heap_fire_s"], _ = _measure(lambda: heap.fire_due(now), memory=False)
+    with db_session() as s:
+        out["heap_runs"] = s.execute(select(func.count(Run.id))).scalar()
+    out["heap_fired"] = fired
+
+    _reset(now, jitter_seconds=JITTER_SECONDS)
+    heap = HeapScheduler(horizon_seconds=3600, misfire_grace_seconds=60)
+    heap.full_load(now)
+    out["heap_jitter_fired"], out["heap_jitter_fire_s"], _ = _measure(lambda: heap.fire_due(now), memory=False)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(_bench_one(args.child)))
+        return
+
+    results = []
+    for n in args.tasks:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Fresh DB (and engine) per size: settings are read at import time.
+            env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp}/bench.db"}
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", str(n)], env=env, capture_output=True, text=True, check=True
+            )
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'tasks':>8} | {'engine':<11} | {'load s':>8} | {'load MB':>8} | {'tick ms':>8} | {'fire all s':>10}")
+    for r in results:
+        print(
+            f"{r['tasks']:>8} | {'apscheduler':<11} | {r['aps_load_s']:>8.2f} | {r['aps_load_mb']:>8.1f} | "
+            f"{r['aps_tick_s'] * 1000:>8.1f} | {r['aps_fire_s']:>10.2f}  (per-task enqueue, extrapolated)"
+        )
+        print(
+            f"{'':>8} | {'  batched':<11} | {'':>8} | {'':>8} | {'':>8} | "
+            f"{r['aps_batched_fire_s']:>10.2f}  ({r['aps_batched_runs']} runs, enqueue buffer)"
+        )
+        print(
+            f"{r['tasks']:>8} | {'heap':<11} | {r['heap_load_s']:>8.2f} | {r['heap_load_mb']:>8.1f} | "
+            f"{r['heap_tick_s'] * 1000:>8.1f} | {r['heap_fire_s']:>10.2f}  ({r['heap_fired']} runs, one transaction)"
+        )
+        print(
+            f"{'':>8} | {'  jittered':<11} | {'':>8} | {'':>8} | {'':>8} | "
+            f"{r['heap_jitter_fire_s']:>10.2f}  ({r['heap_jitter_fired']} runs, jitter_seconds={JITTER_SECONDS})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Micro-benchmark: TableResult normalization and JSON column encoding on large tables.
+
+    cd backend && python scripts/bench_table_normalize.py --rows 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import orjson  # noqa: E402
+from pydantic import BaseModel, model_validator  # noqa: E402
+
+from app.database import _json_dumps  # noqa: E402
+from app.services.llm_schema import TableColumn, TableResult  # noqa: E402
+
+
+COLUMNS = [
+    {"key": "name", "label": "Name", "type": "string"},
+    {"key": "url", "label": "URL", "type": "url"},
+    {"key": "price", "label": "Price", "type": "number"},
+    {"key": "in_stock", "label": "In Stock", "type": "boolean"},
+    {"key": "updated", "label": "Updated", "type": "date"},
+    {"key": "notes", "label": "Notes", "type": "string"},
+]
+
+
+def _make_rows(n: int) -> list[dict]:
+    # "notes" is left out on purpose so the normalizer has keys to fill.
+    return [
+        {
+            "name": f"item {i}",
+            "url": f"https://example.com/items/{i}",
+            "price": i * 1.5,
+            "in_stock": i % 2 == 0,
+            "updated": "2025-01-01T00:00:00Z",
+        }
+        for i in range(n)
+    ]
+
+
+class _LegacyTableResult(BaseModel):
+    # The previous model: copy + setdefault per key, then a second scan for the empty check.
+    columns: list[TableColumn]
+    rows: list[dict]
+    summary: str | None = None
+
+    @model_validator(mode="after")
+    def _normalize_rows(self) -> "_LegacyTableResult":
+        keys = [c.key for c in self.columns]
+        normalized: list[dict] = []
+        for row in self.rows:
+            out = dict(row or {})
+            for k in keys:
+                out.setdefault(k, None)
+            normalized.append(out)
+        self.rows = normalized
+        all_empty = True
+        for row in self.rows:
+            for k in keys:
+                v = row.get(k)
+                if v is not None and v != "":
+                    all_empty = False
+                    break
+            if not all_empty:
+                break
+        return self
+
+
+def _legacy_pipeline(payload: dict) -> str:
+    table = _LegacyTableResult.model_validate(payload)
+    rows = list(table.rows)  # the worker's extra copy
+    return json.dumps(rows)
+
+
+def _new_pipeline(payload: dict) -> str:
+    table = TableResult.model_validate(payload)
+    return _json_dumps(table.rows)
+
+
+def _best_of(fn, repeat: int) -> float:  # type: ignore[no-untyped-def]
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = _make_rows(args.rows)
+    payload = {"columns": COLUMNS, "rows": rows, "summary": None}
+    encoded = _json_dumps(TableResult.model_validate(payload).rows)
+
+    results = {
+        "validate (legacy two-pass, no coercion)": _best_of(lambda: _LegacyTableResult.model_validate(payload), args.repeat),
+        "validate (single pass + coercion)": _best_of(lambda: TableResult.model_validate(payload), args.repeat),
+        "encode rows (stdlib json)": _best_of(lambda: json.dumps(rows), args.repeat),
+        "encode rows (orjson)": _best_of(lambda: _json_dumps(rows), args.repeat),
+        "decode rows (stdlib json)": _best_of(lambda: json.loads(encoded), args.repeat),
+        "decode rows (orjson)": _best_of(lambda: orjson.loads(encoded), args.repeat),
+        "validate + copy + encode (legacy)": _best_of(lambda: _legacy_pipeline(payload), args.repeat),
+        "validate + encode (new)": _best_of(lambda: _new_pipeline(payload), args.repeat),
+    }
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, best of {args.repeat}")
+    for name, ms in results.items():
+        print(f"  {name:<55} {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Local stand-in for an OpenAI-compatible Batch API (/v1/files, /v1/batches), for exercising
+deferred tasks without a provider account. Batches complete after --delay seconds with a small
+valid table per request (or an error line, see --fail-rate).
+
+    cd backend && python scripts/fake_batch_server.py --port 8089 --delay 5
+    LLM_BATCH_BASE_URL=http://127.0.0.1:8089/v1 LLM_BATCH_MODEL=<model> python -m app.cli worker
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+FILES: dict[str, bytes] = {}
+BATCHES: dict[str, dict] = {}
+LOCK = threading.Lock()
+ARGS = argparse.Namespace(delay=5.0, fail_rate=0.0)
+
+
+def _table_for(request: dict) -> str:
+    messages = request["body"].get("messages") or []
+    prompt = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return json.dumps(
+        {
+            "columns": [
+                {"key": "prompt", "label": "Prompt", "type": "string"},
+                {"key": "length", "label": "Length", "type": "number"},
+            ],
+            "rows": [{"prompt": prompt[:80], "length": len(prompt)}],
+            "summary": "fake batch result",
+        }
+    )
+
+
+def _result_line(request: dict) -> dict:
+    custom_id = request["custom_id"]
+    if random.random() < ARGS.fail_rate:
+        return {"id": f"resp_{uuid.uuid4().hex[:8]}", "custom_id": custom_id, "response": None,
+                "error": {"code": "fake_error", "message": "Injected failure"}}
+    content = _table_for(request)
+    prompt_tokens = sum(len(m.get("content") or "") for m in request["body"].get("messages") or []) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"resp_{uuid.uuid4().hex[:8]}",
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "request_id": uuid.uuid4().hex,
+            "body": {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:8]}",
+                "object": "chat.completion",
+                "model": request["body"].get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        },
+        "error": None,
+    }
+
+
+def _advance(batch: dict) -> dict:
+    # Called under LOCK: move the batch along based on its age.
+    if batch["status"] in ("completed", "failed"):
+        return batch
+    age = time.time() - batch["created_at"]
+    if age < ARGS.delay:
+        batch["status"] = "validating" if age < ARGS.delay / 4 else "in_progress"
+        return batch
+
+    requests = [json.loads(line) for line in FILES[batch["input_file_id"]].splitlines() if line.strip()]
+    lines = [_result_line(r) for r in requests]
+    ok = [line for line in lines if line["error"] is None]
+    failed = [line for line in lines if line["error"] is not None]
+    for name, content in (("output_file_id", ok), ("error_file_id", failed)):
+        if content:
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            FILES[file_id] = "\n".join(json.dumps(line) for line in content).encode()
+            batch[name] = file_id
+    batch.update(status="completed", completed_at=int(time.time()),
+                 request_counts={"total": len(lines), "completed": len(ok), "failed": len(failed)})
+    return batch
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, payload: object, *, raw: bytes | None = None) -> None:
+        body = raw if raw is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json" if raw is None else "application/jsonl")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path == "/v1/files":
+            message = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self._body()
+            )
+            content = next(
+                (p.get_payload(decode=True) for p in message.iter_parts() if p.get_param("name", header="content-disposition") == "file"),
+                None,
+            )
+            if content is None:
+                return self._send(400, {"error": {"message": "missing file"}})
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with LOCK:
+                FILES[file_id] = content
+            return self._send(200, {"id": file_id, "object": "file", "purpose": "batch", "bytes": len(content)})
+
+        if self.path == "/v1/batches":
+            payload = json.loads(self._body() or b"{}")
+            with LOCK:
+                if payload.get("input_file_id") not in FILES:
+                    return self._send(404, {"error": {"message": "input file not found"}})
+                batch = {
+                    "id": f"batch_{uuid.uuid4().hex[:12]}",
+                    "object": "batch",
+                    "endpoint": payload.get("endpoint"),
+                    "input_file_id": payload["input_file_id"],
+                    "completion_window": payload.get("completion_window"),
+                    "status": "validating",
+                    "output_file_id": None,
+                    "error_file_id": None,
+                    "created_at": time.time(),
+                }
+                BATCHES[batch["id"]] = batch
+            return self._send(200, batch)
+
+        self._send(404, {"error": {"message": "not found"}})
+
+    def do_GET(self) -> None:  # noqa: N802
+        parts = self.path.strip("/").split("/")
+        with LOCK:
+            if len(parts) == 3 and parts[:2] == ["v1", "batches"] and parts[2] in BATCHES:
+                return self._send(200, _advance(BATCHES[parts[2]]))
+            if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content" and parts[2] in FILES:
+                return self._send(200, None, raw=FILES[parts[2]])
+        self._send(404, {"error": {"message": "not found"}})
+
+    def log_message(self, fmt: str, *args: object) -> None:
+        print(f"[fake-batch] {self.command} {self.path} -> {args[1] if len(args) > 1 else ''}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=5.0, help="seconds until a batch completes")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with an error line")
+    args = parser.parse_args()
+    ARGS.delay, ARGS.fail_rate = args.delay, args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"fake batch API on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()